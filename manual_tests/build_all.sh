@@ -1,14 +1,76 @@
 #!/bin/bash
 set -e
+# A failing stage inside a pipeline must fail the pipeline, not just its last command
+set -o pipefail
 
 # Get the root directory of the repository
 SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 ROOT_DIR="$(dirname "$SCRIPT_DIR")"
 
-echo "Building mstl..."
-go build -o "$ROOT_DIR/bin/mstl" "$ROOT_DIR/cmd/mstl"
-echo "mstl built at bin/mstl"
+# sha256sum is not available on stock macOS; shasum -a 256 prints the same format.
+if command -v sha256sum >/dev/null 2>&1; then
+    SHA256=(sha256sum)
+else
+    SHA256=(shasum -a 256)
+fi
 
-echo "Building mstl-gh..."
-go build -o "$ROOT_DIR/bin/mstl-gh" "$ROOT_DIR/cmd/mstl-gh"
-echo "mstl-gh built at bin/mstl-gh"
+# The toolchain and target are hashed along with the sources, so a Go upgrade or
+# a different GOOS/GOARCH/GOFLAGS never reuses a binary built under other settings.
+# Queried from the module root, so a toolchain selected by go.mod is the one reported.
+if ! TOOLCHAIN="$(cd "$ROOT_DIR" && go env GOVERSION GOOS GOARCH GOFLAGS)"; then
+    echo "Failed to query the Go toolchain with 'go env'" >&2
+    exit 1
+fi
+
+# Prints a hash of the toolchain settings and every Go source that goes into the given command.
+source_hash() {
+    (cd "$ROOT_DIR" && {
+        printf '%s\n' "$TOOLCHAIN"
+        find go.mod go.sum internal "cmd/$1" -type f \( -name '*.go' -o -name 'go.mod' -o -name 'go.sum' \) ! -name '*_test.go' \
+            | LC_ALL=C sort | xargs "${SHA256[@]}"
+    } | "${SHA256[@]}" | cut -d' ' -f1)
+}
+
+# Binaries from earlier builds, keyed by source and toolchain hash, so switching
+# back to a previously built revision only needs a copy. build_if_changed exits
+# before reaching the cache when the hash is empty.
+CACHE_DIR="${XDG_CACHE_HOME:-$HOME/.cache}/mistletoe-tests"
+
+# Builds bin/<name> unless the binary exists and its sources are unchanged
+# since the last build (tracked in bin/.<name>.buildhash).
+build_if_changed() {
+    local name="$1"
+    local out="$ROOT_DIR/bin/$name"
+    local hash_file="$ROOT_DIR/bin/.$name.buildhash"
+    local hash
+    hash="$(source_hash "$name")"
+    # An empty hash would match an empty stamp and skip every rebuild
+    if [[ -z "$hash" ]]; then
+        echo "Failed to hash the sources of $name" >&2
+        exit 1
+    fi
+    local cached="$CACHE_DIR/$name-$hash"
+
+    if [[ -x "$out" && -f "$hash_file" && "$(cat "$hash_file")" == "$hash" ]]; then
+        echo "$name is up to date at bin/$name"
+        return
+    fi
+
+    if [[ -x "$cached" ]]; then
+        mkdir -p "$ROOT_DIR/bin"
+        cp "$cached" "$out"
+        echo "$hash" > "$hash_file"
+        echo "$name restored from cache at bin/$name"
+        return
+    fi
+
+    echo "Building $name..."
+    go build -o "$out" "$ROOT_DIR/cmd/$name"
+    echo "$hash" > "$hash_file"
+    mkdir -p "$CACHE_DIR"
+    cp "$out" "$cached"
+    echo "$name built at bin/$name"
+}
+
+build_if_changed mstl
+build_if_changed mstl-gh
@@ -0,0 +1,29 @@
+#!/bin/sh
+# Minimal gh stand-in placed on PATH by manual_test_gh_pr_create_safety.py.
+# Plain sh, since mstl-gh calls gh many times and each call would otherwise
+# start a Python interpreter. mstl-gh always passes the subcommand first, so
+# the first two arguments are enough to pick the response.
+
+case "$1 $2" in
+    "auth status")
+        echo "Logged in to github.com as testuser"
+        ;;
+    "--version "*)
+        echo "gh version 2.0.0"
+        ;;
+    "pr list")
+        # Simulate network delay slightly to ensure table renders first
+        sleep 0.5
+        echo "[]"
+        ;;
+    "repo view")
+        case "$*" in
+            *"-q .viewerPermission"*) echo "WRITE" ;;
+            *) echo '{"viewerPermission": "WRITE"}' ;;
+        esac
+        ;;
+    *)
+        echo ""
+        ;;
+esac
+exit 0
@@ -2,16 +2,49 @@ import os
 import sys
 import uuid
 import json
+import functools
 import shutil
 import subprocess
 import signal
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from interactive_runner import print_green
+from local_repo_env import GH, GIT, create_bare_repo, run_git
+
+# The authenticated user and git credential setup do not change within a process,
+# so they are shared by every GhTestEnv instance.
+_GIT_AUTH_DONE = False
+
+@functools.lru_cache(maxsize=1)
+def _cached_gh_user():
+    mock_user = os.environ.get("MOCK_GH_USER")
+    if mock_user:
+        return mock_user
+
+    try:
+        res = subprocess.run(
+            [GH, "api", "user", "--jq", ".login"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+        )
+    except subprocess.CalledProcessError:
+        print_green("[ERROR] Failed to get GitHub user. Is 'gh' installed and authenticated?")
+        sys.exit(1)
+    # GitHub logins are ASCII-only
+    return res.stdout.strip().decode("ascii")
+
+# Computed once at import; every GhTestEnv uses the same pre-built binary.
+_MSTL_GH_BIN = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../bin/mstl-gh"))
+if sys.platform == "win32":
+    _MSTL_GH_BIN += ".exe"
 
 class GhTestEnv:
     VISIBILITY_PRIVATE = "private"
     VISIBILITY_PUBLIC = "public"
 
+    # Shared sink for discarded subprocess output instead of reopening /dev/null per call.
+    _devnull = open(os.devnull, "wb")
+
     def __init__(self, root_dir=None):
         self.cwd = root_dir if root_dir else os.getcwd()
         self.user = self.get_gh_user()
@@ -19,10 +52,7 @@ class GhTestEnv:
         self.auto_yes = False
 
         # Determine paths
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.mstl_bin = os.path.abspath(os.path.join(script_dir, "../bin/mstl-gh"))
-        if sys.platform == "win32":
-            self.mstl_bin += ".exe"
+        self.mstl_bin = _MSTL_GH_BIN
 
         if not os.path.exists(self.mstl_bin):
             print_green(f"[ERROR] mstl-gh binary not found at {self.mstl_bin}. Please run build_all.sh first.")
@@ -36,46 +66,68 @@ class GhTestEnv:
         # Repository info placeholders
         self.repo_names = []
         self.repo_urls = {}
+        self._setup_cleanup = None
 
-        # Configure git to use gh for credentials
-        self.setup_git_auth()
+        # Configure git to use gh for credentials (mock mode only talks to local bare repos)
+        if not os.environ.get("MOCK_GH_USER"):
+            self.setup_git_auth()
 
     def setup_git_auth(self):
+        global _GIT_AUTH_DONE
+        if _GIT_AUTH_DONE:
+            return
         try:
-            subprocess.run(["gh", "auth", "setup-git"], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            subprocess.run([GH, "auth", "setup-git"], check=True, stdout=self._devnull, stderr=self._devnull)
             # Suppress default branch hint
-            subprocess.run(["git", "config", "--global", "init.defaultBranch", "main"], check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            subprocess.run([GIT, "config", "--global", "init.defaultBranch", "main"], check=False, stdout=self._devnull, stderr=self._devnull)
+            _GIT_AUTH_DONE = True
         except Exception as e:
             print(f"[WARNING] Failed to setup git auth via gh: {e}")
 
     def get_gh_user(self):
-        try:
-            res = subprocess.run(
-                ["gh", "api", "user", "--jq", ".login"],
-                capture_output=True, text=True, check=True
-            )
-            return res.stdout.strip()
-        except subprocess.CalledProcessError:
-            print_green("[ERROR] Failed to get GitHub user. Is 'gh' installed and authenticated?")
-            # FALLBACK for test environment without gh
-            if os.environ.get("MOCK_GH_USER"):
-                 return os.environ.get("MOCK_GH_USER")
-            sys.exit(1)
+        return _cached_gh_user()
 
     def generate_repo_names(self, count=3):
         while True:
             names = [f"mistletoe-test-{self.uuid}-{chr(65+i)}" for i in range(count)]
-            if all(not self.repo_exists(n) for n in names):
+            if not self.existing_repos(names):
                 self.repo_names = names
                 self.repo_urls = {n: f"git@github.com:{self.user}/{n}.git" for n in names}
                 return
             self.uuid = str(uuid.uuid4())[:8]
 
+    def existing_repos(self, repo_names):
+        """Returns the subset of repo_names that already exist, using a single GraphQL query."""
+        if not repo_names:
+            return set()
+        if os.environ.get("MOCK_GH_USER"):
+            return {n for n in repo_names if os.path.exists(os.path.join(self.cwd, f"{n}.git"))}
+
+        fields = " ".join(
+            f'r{i}: repository(owner: $owner, name: "{name}") {{ id }}'
+            for i, name in enumerate(repo_names)
+        )
+        query = f"query($owner: String!) {{ {fields} }}"
+        res = subprocess.run(
+            [GH, "api", "graphql", "-f", f"owner={self.user}", "-f", f"query={query}"],
+            stdout=subprocess.PIPE, stderr=self._devnull
+        )
+        # Missing repositories are reported as errors with a null alias, so gh exits
+        # non-zero even on a valid response. Only fall back when there is no data.
+        try:
+            data = json.loads(res.stdout)["data"]
+        except (ValueError, KeyError, TypeError):
+            return {n for n in repo_names if self.repo_exists(n)}
+        if not data:
+            return {n for n in repo_names if self.repo_exists(n)}
+
+        return {name for i, name in enumerate(repo_names) if data.get(f"r{i}")}
+
     def repo_exists(self, repo_name):
         try:
             subprocess.run(
-                ["gh", "repo", "view", f"{self.user}/{repo_name}"],
-                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                [GH, "repo", "view", f"{self.user}/{repo_name}"],
+                check=True, stdout=self._devnull, stderr=self._devnull
             )
             return True
         except subprocess.CalledProcessError:
@@ -95,44 +147,85 @@ class GhTestEnv:
              # Create bare repos to simulate remote
              pass
         else:
-             for repo in self.repo_names:
-                subprocess.run(["gh", "repo", "create", repo, f"--{visibility}"], check=True)
+             self.create_repos(visibility)
 
         tmp_setup = os.path.join(self.cwd, f"setup_{self.uuid}")
         os.makedirs(tmp_setup, exist_ok=True)
 
         try:
-            for repo in self.repo_names:
-                r_dir = os.path.join(tmp_setup, repo)
-                os.makedirs(r_dir)
-                subprocess.run(["git", "init"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-                # Configure dummy user for committing
-                subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-                subprocess.run(["git", "config", "user.name", "Test User"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-
-                remote_url = f"git@github.com:{self.user}/{repo}.git"
-                if os.environ.get("MOCK_GH_USER"):
-                     # Create a local bare repo to act as remote
-                     bare_dir = os.path.join(self.cwd, f"{repo}.git")
-                     os.makedirs(bare_dir, exist_ok=True)
-                     subprocess.run(["git", "init", "--bare"], cwd=bare_dir, check=True, stdout=subprocess.DEVNULL)
-                     # Set default branch
-                     subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=bare_dir, check=True, stdout=subprocess.DEVNULL)
-                     remote_url = bare_dir
-
-                subprocess.run(["git", "remote", "add", "origin", remote_url], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-
-                readme_path = os.path.join(r_dir, "README.md")
-                with open(readme_path, "w") as f:
-                    f.write(f"# {repo}")
-
-                subprocess.run(["git", "add", "."], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-                subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-                # Ensure the branch is named 'main' before pushing
-                subprocess.run(["git", "branch", "-M", "main"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-                subprocess.run(["git", "push", "-u", "origin", "main"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+            # Every initial commit is written into one shared bare object store and
+            # pushed from there, instead of a separate clone per repository.
+            seed_dir = os.path.join(tmp_setup, "objects.git")
+            subprocess.run([GIT, "init", "--bare", "-q", seed_dir], check=True)
+            self._run_parallel(lambda repo: self._provision_one_repo(repo, seed_dir), self.repo_names)
         finally:
-            shutil.rmtree(tmp_setup, ignore_errors=True)
+            # The seed clones are no longer needed; remove them without blocking the test.
+            # Not a daemon thread, so the interpreter still waits for it on exit.
+            self._setup_cleanup = threading.Thread(
+                target=shutil.rmtree, args=(tmp_setup,), kwargs={"ignore_errors": True}
+            )
+            self._setup_cleanup.start()
+
+    def create_repos(self, visibility):
+        """Creates all repositories with one batched GraphQL mutation, falling back to 'gh repo create'."""
+        fields = " ".join(
+            f'c{i}: createRepository(input: {{name: "{name}", visibility: {visibility.upper()}}}) {{ repository {{ nameWithOwner }} }}'
+            for i, name in enumerate(self.repo_names)
+        )
+        res = subprocess.run(
+            [GH, "api", "graphql", "-f", f"query=mutation {{ {fields} }}"],
+            stdout=subprocess.PIPE, stderr=self._devnull
+        )
+        try:
+            data = json.loads(res.stdout).get("data") or {}
+        except ValueError:
+            data = {}
+
+        # Any repository the batch did not create (older gh, partial failure) is created individually.
+        remaining = [name for i, name in enumerate(self.repo_names) if not data.get(f"c{i}")]
+        self._run_parallel(
+            lambda repo: subprocess.run([GH, "repo", "create", repo, f"--{visibility}"], check=True),
+            remaining
+        )
+
+    def _run_parallel(self, func, repos):
+        """Runs func for every repo concurrently and re-raises the first failure after all finish."""
+        max_workers = min(len(repos), max(4, (os.cpu_count() or 2) * 3 // 4)) or 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(func, repo) for repo in repos]
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        if errors:
+            raise errors[0]
+
+    def _seed_git(self, seed_dir, args, input_str=None):
+        """Runs a git plumbing command in the shared seed store and returns what it prints."""
+        res = subprocess.run(
+            [GIT, "--git-dir", seed_dir, "-c", "user.email=test@example.com", "-c", "user.name=Test User"] + args,
+            input=input_str, capture_output=True, text=True, check=True
+        )
+        return res.stdout.strip()
+
+    def _provision_one_repo(self, repo, seed_dir):
+        remote_url = f"git@github.com:{self.user}/{repo}.git"
+        if os.environ.get("MOCK_GH_USER"):
+             # Create a local bare repo to act as remote, with 'main' as its default branch
+             bare_dir = os.path.join(self.cwd, f"{repo}.git")
+             create_bare_repo(bare_dir)
+             # The tests push here repeatedly; no auto gc or repacking after each push,
+             # and received packs are kept as they are rather than unpacked
+             with open(os.path.join(bare_dir, "config"), "a") as f:
+                 f.write("[receive]\n\tautogc = false\n[gc]\n\tauto = 0\n[transfer]\n\tunpackLimit = 1\n")
+             remote_url = bare_dir
+
+        # Object writes are atomic, so the repositories can share the store concurrently.
+        # A push only sends objects reachable from its own commit.
+        blob = self._seed_git(seed_dir, ["hash-object", "-w", "--stdin"], f"# {repo}")
+        tree = self._seed_git(seed_dir, ["mktree"], f"100644 blob {blob}\tREADME.md\n")
+        commit = self._seed_git(seed_dir, ["commit-tree", tree, "-m", "Initial commit"])
+        subprocess.run(
+            [GIT, "--git-dir", seed_dir, "push", "-q", remote_url, f"{commit}:refs/heads/main"],
+            check=True, stdout=self._devnull
+        )
 
     def create_config_and_graph(self):
         os.makedirs(self.test_dir, exist_ok=True)
@@ -151,45 +244,84 @@ class GhTestEnv:
         config = {
             "repositories": config_repos
         }
-        with open(self.config_file, "w") as f:
-            json.dump(config, f, indent=2)
+        with open(self.config_file, "wb") as f:
+            f.write(json.dumps(config, indent=2).encode("utf-8"))
 
         # Only create graph if we have enough repos (mock implementation for fewer)
-        with open(self.dependency_file, "w") as f:
-            f.write("```mermaid\n")
-            f.write("graph TD\n")
-            if len(self.repo_names) >= 3:
-                a, b, c = self.repo_names[0], self.repo_names[1], self.repo_names[2]
-                f.write(f'    {a} --> {b}\n')
-                f.write(f'    {b} --> {c}\n')
-                if len(self.repo_names) >= 4:
-                     d = self.repo_names[3]
-                     f.write(f'    {d}\n')
-            else:
-                for n in self.repo_names:
-                     f.write(f'    {n}\n')
-            f.write("```\n")
+        lines = ["```mermaid", "graph TD"]
+        if len(self.repo_names) >= 3:
+            a, b, c = self.repo_names[0], self.repo_names[1], self.repo_names[2]
+            lines.append(f'    {a} --> {b}')
+            lines.append(f'    {b} --> {c}')
+            if len(self.repo_names) >= 4:
+                 d = self.repo_names[3]
+                 lines.append(f'    {d}')
+        else:
+            for n in self.repo_names:
+                 lines.append(f'    {n}')
+        lines.append("```")
+        with open(self.dependency_file, "wb") as f:
+            f.write(("\n".join(lines) + "\n").encode("utf-8"))
+
+    def commit_test_file(self, filename, content, message):
+        """Writes filename into every checked-out test repository and commits it, concurrently."""
+        # Paths are built once up front so the workers only do file and process I/O.
+        targets = [
+            (r_dir, os.path.join(r_dir, filename))
+            for r_dir in (os.path.join(self.test_dir, repo) for repo in self.repo_names)
+        ]
+        def commit(target):
+            r_dir, file_path = target
+            with open(file_path, "w") as f:
+                f.write(content)
+            run_git(["-C", r_dir, "add", filename], check=True, stdout=self._devnull)
+            run_git(
+                ["-C", r_dir, "-c", "user.email=test@example.com", "-c", "user.name=Test User", "commit", "-m", message],
+                check=True, stdout=self._devnull
+            )
+        self._run_parallel(commit, targets)
 
     def cleanup(self):
         print_green("[-] Cleaning up workspace...")
-        if os.path.exists(self.test_dir):
-            shutil.rmtree(self.test_dir, ignore_errors=True)
+        if self._setup_cleanup:
+            self._setup_cleanup.join()
+        shutil.rmtree(self.test_dir, ignore_errors=True)
 
         print_green("[-] Deleting remote repositories...")
 
         if os.environ.get("MOCK_GH_USER"):
              for repo in self.repo_names:
-                  bare_dir = os.path.join(self.cwd, f"{repo}.git")
-                  if os.path.exists(bare_dir):
-                       shutil.rmtree(bare_dir, ignore_errors=True)
+                  shutil.rmtree(os.path.join(self.cwd, f"{repo}.git"), ignore_errors=True)
              return
 
+        # Delete directly first; only repositories that could not be removed go
+        # through the slower rename -> verify -> delete sequence.
+        print_green("    Deleting repositories...")
+        failed = []
+
+        def delete(repo):
+            res = subprocess.run([GH, "repo", "delete", f"{self.user}/{repo}", "--yes"], stdout=self._devnull, stderr=self._devnull)
+            if res.returncode == 0:
+                print_green(f"    Deleted {repo}")
+            else:
+                failed.append(repo)
+
+        try:
+            self._run_parallel(delete, self.repo_names)
+        except Exception as e:
+            print_green(f"    Failed to delete repositories: {e}")
+            failed = list(self.repo_names)
+
+        if failed:
+            self._rename_and_delete(failed)
+
+    def _rename_and_delete(self, repo_names):
         # 1. Rename all repositories
         print_green("    Renaming repositories...")
-        for repo in self.repo_names:
+        for repo in repo_names:
             try:
                 new_name = f"{repo}-deleting"
-                subprocess.run(["gh", "repo", "rename", new_name, "--repo", f"{self.user}/{repo}", "--yes"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                subprocess.run([GH, "repo", "rename", new_name, "--repo", f"{self.user}/{repo}", "--yes"], stdout=self._devnull, stderr=self._devnull)
             except Exception as e:
                 print_green(f"    Failed to rename {repo}: {e}")
 
@@ -198,10 +330,9 @@ class GhTestEnv:
         # 2. Verify renames
         print_green("    Verifying renames...")
         try:
-            res = subprocess.run(["gh", "repo", "list", self.user, "--json", "name", "--limit", "1000"], capture_output=True, text=True, check=True)
-            repos = json.loads(res.stdout)
-            current_names = [r["name"] for r in repos]
-            for repo in self.repo_names:
+            # Query only the renamed repositories instead of listing every repository of the user
+            current_names = self.existing_repos([f"{repo}-deleting" for repo in repo_names])
+            for repo in repo_names:
                 new_name = f"{repo}-deleting"
                 if new_name not in current_names:
                     print_green(f"    [WARNING] Rename verification failed for {repo}")
@@ -212,10 +343,10 @@ class GhTestEnv:
 
         # 3. Delete renamed repositories
         print_green("    Deleting repositories...")
-        for repo in self.repo_names:
+        for repo in repo_names:
             try:
                 new_name = f"{repo}-deleting"
-                subprocess.run(["gh", "repo", "delete", f"{self.user}/{new_name}", "--yes"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                subprocess.run([GH, "repo", "delete", f"{self.user}/{new_name}", "--yes"], stdout=self._devnull, stderr=self._devnull)
                 print_green(f"    Deleted {repo}")
             except Exception as e:
                 print_green(f"    Failed to delete {repo}: {e}")
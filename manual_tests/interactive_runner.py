@@ -1,5 +1,7 @@
+import os
 import sys
 import argparse
+import atexit
 import datetime
 import traceback
 
@@ -7,11 +9,13 @@ GREEN = '\033[92m'
 RED = '\033[91m'
 RESET = '\033[0m'
 
+_GREEN_SEP = GREEN + "=" * 60 + RESET + "\n"
+
 def print_green(text):
-    print(f"{GREEN}{text}{RESET}")
+    sys.stdout.write(GREEN + str(text) + RESET + "\n")
 
 def print_red(text):
-    print(f"{RED}{text}{RESET}")
+    sys.stdout.write(RED + str(text) + RESET + "\n")
 
 class InteractiveRunner:
     def __init__(self, description):
@@ -20,13 +24,21 @@ class InteractiveRunner:
         self.parser.add_argument("--yes", action="store_true", help="Automatically answer yes to all prompts and pass --yes to mstl commands")
         self.args = None
         self.log_file = None
+        self._log_fh = None
         self.test_name = description
         self.failed = False
+        self.auto_yes = False
+        # MSTL_QUIET_YES suppresses the echo of auto-answered prompts in long --yes runs.
+        self.quiet_yes = bool(os.environ.get("MSTL_QUIET_YES"))
 
     def parse_args(self):
         self.args = self.parser.parse_args()
+        self.auto_yes = self.args.yes
         if self.args.output:
             self.log_file = self.args.output
+            # Line-buffered so each result reaches the file immediately, even if the test exits abruptly.
+            self._log_fh = open(self.log_file, "a", buffering=1)
+            atexit.register(self._log_fh.close)
 
     def log(self, message, status=None):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -39,9 +51,8 @@ class InteractiveRunner:
         else:
             print_green(line)
 
-        if self.log_file:
-            with open(self.log_file, "a") as f:
-                f.write(line + "\n")
+        if self._log_fh:
+            self._log_fh.write(line + "\n")
 
     def fail(self, message):
         self.log(message, status="FAILED")
@@ -49,13 +60,14 @@ class InteractiveRunner:
         sys.exit(1)
 
     def print_section(self, title):
-        print_green("\n" + "="*60)
+        sys.stdout.write("\n" + _GREEN_SEP)
         print_green(title)
-        print_green("="*60)
+        sys.stdout.write(_GREEN_SEP)
 
     def ask_yes_no(self, question, default="yes", force_interactive=False):
-        if self.args and self.args.yes and not self.failed and not force_interactive:
-            print(f"{question} [Y/n] (Auto-Yes): yes")
+        if self.auto_yes and not self.failed and not force_interactive:
+            if not self.quiet_yes:
+                print(f"{question} [Y/n] (Auto-Yes): yes")
             return True
 
         valid = {"yes": True, "y": True, "ye": True, "no": False, "n": False}
@@ -0,0 +1,156 @@
+import os
+import json
+import sys
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Resolved once for every manual test, so no subprocess call repeats the PATH lookup
+GIT = shutil.which("git") or "git"
+GH = shutil.which("gh") or "gh"
+
+# Opened once and shared by every subprocess call that discards output
+_DEVNULL = open(os.devnull, "wb")
+
+def scratch_parent():
+    """
+    Returns the directory to create temporary test trees in: $MSTL_TEST_TMP if set,
+    else the RAM-backed /dev/shm on Linux, else None (the default temp directory).
+    """
+    override = os.environ.get("MSTL_TEST_TMP")
+    if override:
+        return override
+    if sys.platform.startswith("linux") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return None
+
+def fast_rmtree(path):
+    """Removes a directory tree if present, letting the native rm walk large .git trees on POSIX."""
+    if sys.platform == "win32":
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        subprocess.run(["rm", "-rf", path], check=True)
+
+# Computed once at import rather than on every lookup
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+_MSTL_BIN = os.path.abspath(os.path.join(_SCRIPT_DIR, "../bin/mstl"))
+if sys.platform == "win32":
+    _MSTL_BIN += ".exe"
+_BUILD_SCRIPT = os.path.join(_SCRIPT_DIR, "build_all.sh")
+
+def discard_tree(path):
+    """
+    Removes path without waiting for the deletion: the tree is renamed aside and
+    handed to a detached rm that outlives this process. Safe to call from atexit
+    handlers, where new threads can no longer be started. Windows deletes in place.
+    """
+    if sys.platform == "win32":
+        shutil.rmtree(path, ignore_errors=True)
+        return
+    if not os.path.lexists(path):
+        return
+    # A fresh directory beside path gives a name no earlier run or call can hold;
+    # path is moved inside it, which stays a rename on the same filesystem.
+    trash = tempfile.mkdtemp(prefix=os.path.basename(path) + ".trash.", dir=os.path.dirname(path) or None)
+    try:
+        os.rename(path, os.path.join(trash, "tree"))
+    except FileNotFoundError:
+        os.rmdir(trash)
+        return
+    except OSError:
+        os.rmdir(trash)
+        fast_rmtree(path)
+        return
+    subprocess.Popen(["rm", "-rf", trash], start_new_session=True, stdin=_DEVNULL, stdout=_DEVNULL, stderr=_DEVNULL)
+
+def mstl_binary():
+    """
+    Returns the path of the pre-built mstl binary. If it is missing, build_all.sh
+    is run once, which restores it from the source-hash cache or builds it.
+    """
+    if not os.path.exists(_MSTL_BIN):
+        bash = shutil.which("bash")
+        if bash:
+            subprocess.run([bash, _BUILD_SCRIPT], stdout=_DEVNULL)
+        if not os.path.exists(_MSTL_BIN):
+            raise Exception(f"mstl binary not found at {_MSTL_BIN}. Please run build_all.sh first.")
+    return _MSTL_BIN
+
+def run_git(args, **kwargs):
+    """
+    Runs git with args and returns the CompletedProcess; kwargs go to subprocess.run.
+    Callers name the repository with -C or --git-dir instead of passing a cwd:
+    with no cwd and close_fds=False, subprocess starts git with posix_spawn
+    rather than fork+exec. Python's own descriptors are created non-inheritable,
+    so nothing extra leaks into git.
+    """
+    kwargs.setdefault("close_fds", False)
+    return subprocess.run([GIT] + args, **kwargs)
+
+def _git_plumbing(bare_path, args, input_str):
+    """Runs a git plumbing command against bare_path and returns the object id it prints."""
+    res = run_git(
+        ["--git-dir", bare_path, "-c", "user.email=test@example.com", "-c", "user.name=Test User"] + args,
+        input=input_str, capture_output=True, text=True, check=True
+    )
+    return res.stdout.strip()
+
+def _init_one_repo(name, base_dir, remotes_dir):
+    bare_path = os.path.join(remotes_dir, name + ".git")
+    create_bare_repo(bare_path, "master")
+
+    # Write the initial commit straight into the bare repository instead of
+    # cloning it, committing and pushing back from a temporary working copy.
+    blob = _git_plumbing(bare_path, ["hash-object", "-w", "--stdin"], f"# {name}")
+    tree = _git_plumbing(bare_path, ["mktree"], f"100644 blob {blob}\tREADME.md\n")
+    commit = _git_plumbing(bare_path, ["commit-tree", tree, "-m", "Initial commit"], None)
+    run_git(["--git-dir", bare_path, "update-ref", "refs/heads/master", commit], check=True)
+
+    # Now create the actual working directory structure for mstl
+    repo_work_dir = os.path.join(base_dir, name)
+    run_git(["clone", "--local", "--single-branch", "--no-tags", "--branch", "master", bare_path, repo_work_dir], check=True, stdout=_DEVNULL, stderr=_DEVNULL)
+    return {"id": name, "url": bare_path, "path": repo_work_dir}
+
+def setup_local_repos(base_dir, repo_names):
+    """
+    Creates a bare remote under base_dir/remotes and a clone under base_dir for each name.
+    Returns a list of {"id", "url", "path"} dicts in the order of repo_names.
+    """
+    # Create bare repos to serve as remotes
+    remotes_dir = os.path.join(base_dir, "remotes")
+    os.makedirs(remotes_dir, exist_ok=True)
+
+    # Each repository is independent, so they are set up concurrently.
+    with ThreadPoolExecutor(max_workers=len(repo_names)) as executor:
+        return list(executor.map(lambda name: _init_one_repo(name, base_dir, remotes_dir), repo_names))
+
+def create_bare_repo(path, branch="main", env=None):
+    """
+    Creates an empty bare repository at path whose default branch is branch.
+    env, if given, replaces the environment git runs with.
+    """
+    res = run_git(["init", "--bare", "-b", branch, path], stdout=_DEVNULL, stderr=_DEVNULL, env=env)
+    if res.returncode != 0:
+        # git older than 2.28 has no -b; point HEAD at the branch by writing the
+        # file rather than spawning 'git symbolic-ref'
+        run_git(["init", "--bare", path], check=True, stdout=_DEVNULL, stderr=_DEVNULL, env=env)
+        with open(os.path.join(path, "HEAD"), "w") as f:
+            f.write(f"ref: refs/heads/{branch}\n")
+
+def write_config(path, repositories):
+    """Writes an mstl config listing repositories (a list of dicts) to path as compact JSON."""
+    with open(path, "wb") as f:
+        f.write(json.dumps({"repositories": repositories}, separators=(",", ":")).encode())
+
+def output_contains(needle, out, err):
+    """
+    Reports whether needle occurs in either captured stream (str or bytes),
+    searching each in place instead of concatenating them first.
+    """
+    return needle in out or needle in err
+
+def write_git_user(repo_dir, email="test@example.com", name="Test User"):
+    """Appends a [user] section to repo_dir/.git/config instead of running 'git config' twice."""
+    with open(os.path.join(repo_dir, ".git", "config"), "a") as f:
+        f.write(f"[user]\n\temail = {email}\n\tname = {name}\n")
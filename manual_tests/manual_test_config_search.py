@@ -1,84 +1,28 @@
 import os
-import shutil
 import subprocess
-import sys
-import json
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
-
-def setup_local_repos(base_dir):
-    repo_names = ["repo-a", "repo-b", "repo-c"]
-    repos = []
-
-    # Create bare repos to serve as remotes
-    remotes_dir = os.path.join(base_dir, "remotes")
-    os.makedirs(remotes_dir, exist_ok=True)
-
-    for name in repo_names:
-        bare_path = os.path.join(remotes_dir, name + ".git")
-        os.makedirs(bare_path, exist_ok=True)
-        subprocess.run(["git", "init", "--bare"], cwd=bare_path, check=True, stdout=subprocess.DEVNULL)
-
-        # Clone to create initial commit
-        tmp_clone = os.path.join(base_dir, "tmp_setup_" + name)
-        subprocess.run(["git", "clone", bare_path, tmp_clone], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-        with open(os.path.join(tmp_clone, "README.md"), "w") as f:
-            f.write(f"# {name}")
-
-        subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "config", "user.name", "Test User"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-
-        subprocess.run(["git", "add", "."], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        # Ensure we are on master or rename current branch to master
-        subprocess.run(["git", "branch", "-M", "master"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "push", "origin", "master"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-
-        shutil.rmtree(tmp_clone)
-
-        # Now create the actual working directory structure for mstl
-        repo_work_dir = os.path.join(base_dir, name)
-        subprocess.run(["git", "clone", bare_path, repo_work_dir], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        repos.append({"id": name, "url": bare_path, "path": repo_work_dir})
-
-    return repos
+from local_repo_env import fast_rmtree, mstl_binary, setup_local_repos, write_config
 
 def run_test_logic():
-    # Get absolute path to main.go
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    main_go_path = os.path.join(project_root, "cmd", "mstl", "main.go")
+    mstl_bin = mstl_binary()
 
     test_workspace = os.path.abspath("manual_test_workspace_search")
-    if os.path.exists(test_workspace):
-        shutil.rmtree(test_workspace)
-    os.makedirs(test_workspace)
+    fast_rmtree(test_workspace)
+    os.mkdir(test_workspace)
 
     try:
         print_green("Setting up local test environment...")
-        repos = setup_local_repos(test_workspace)
+        repos = setup_local_repos(test_workspace, ["repo-a", "repo-b", "repo-c"])
 
         # Create .mstl config
         mstl_dir = os.path.join(test_workspace, ".mstl")
-        os.makedirs(mstl_dir, exist_ok=True)
+        os.mkdir(mstl_dir)
 
-        config_repos = []
-        for r in repos:
-            config_repos.append({
-                "id": r["id"],
-                "url": r["url"],
-                "branch": "master"
-            })
-
-        config = {"repositories": config_repos}
         config_path = os.path.join(mstl_dir, "config.json")
-        with open(config_path, "w") as f:
-            json.dump(config, f, indent=2)
+        write_config(config_path, [{"id": r["id"], "url": r["url"], "branch": "master"} for r in repos])
 
-        cmd_base = ["go", "run", main_go_path]
+        cmd_base = [mstl_bin]
 
         # 1. Standard status from root
         # Pass --ignore-stdin just in case
@@ -90,22 +34,16 @@ def run_test_logic():
             print_green("Standard status passed.")
 
         # 2. Test Parent Search (Automatic Switch)
+        # Runs after step 1 rather than alongside it: mstl status fetches in every
+        # repository, and two concurrent fetches would race on the same refs.
         repo1_dir = repos[0]["path"]
         print_green(f"2. Testing Parent Search from sub-directory: {repo1_dir}")
 
         # We must use --ignore-stdin to prevent mstl from treating the pipe as config input
-        process = subprocess.Popen(
-            cmd_base + ["status", "--ignore-stdin"],
-            cwd=repo1_dir,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
-
-        stdout, stderr = process.communicate()
-
-        if process.returncode != 0:
+        result = subprocess.run(cmd_base + ["status", "--ignore-stdin"], cwd=repo1_dir, stdin=subprocess.PIPE, capture_output=True, text=True)
+        stdout, stderr = result.stdout, result.stderr
+
+        if result.returncode != 0:
             print("Stdout:", stdout)
             raise Exception(f"Parent search test failed: {stderr}")
 
@@ -127,7 +65,6 @@ def run_test_logic():
         repo_c_path = repos[2]["path"]
         os.rename(repo_c_path, repo_c_path + "_renamed")
 
-        repo_c_renamed = True
         try:
             process = subprocess.Popen(
                 cmd_base + ["status", "--ignore-stdin"],
@@ -152,14 +89,13 @@ def run_test_logic():
                  raise Exception(f"Unexpected error message: {stderr}")
 
         finally:
-            if repo_c_renamed and os.path.exists(repo_c_path + "_renamed"):
-                os.rename(repo_c_path + "_renamed", repo_c_path)
+            # Always reached after the rename above, so no existence check is needed
+            os.replace(repo_c_path + "_renamed", repo_c_path)
 
         print_green("All checks passed inside run_test_logic.")
 
     finally:
-        if os.path.exists(test_workspace):
-            shutil.rmtree(test_workspace)
+        fast_rmtree(test_workspace)
 
 def main():
     runner = InteractiveRunner("Configuration Search Logic Test")
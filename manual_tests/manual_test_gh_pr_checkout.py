@@ -1,14 +1,32 @@
 #!/usr/bin/env python3
 import os
 import sys
-import shutil
+import json
 import subprocess
 
-# Ensure manual_tests directory is in python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gh_test_env import GhTestEnv
 from interactive_runner import InteractiveRunner, print_green
+from local_repo_env import GH, GIT, discard_tree, fast_rmtree
+
+
+def _commit_counts(repo_dirs):
+    """Returns {repo_dir: commit count of HEAD}, running a single shell for all repositories."""
+    # $1 is the git executable; the repositories follow it. A failing repository
+    # is listed with an empty count and makes the shell exit non-zero.
+    script = (
+        'git="$1"; shift; status=0; for r in "$@"; do '
+        'c=$("$git" -C "$r" rev-list --count HEAD) || status=1; printf "%s\\t%s\\n" "$r" "$c"; '
+        'done; exit $status'
+    )
+    res = subprocess.run(["sh", "-c", script, "sh", GIT] + repo_dirs, capture_output=True, text=True)
+    if res.returncode != 0:
+        print_green(f"    WARNING: Counting commits failed: {res.stderr.strip()}")
+    counts = {}
+    for line in res.stdout.splitlines():
+        path, _, count = line.partition("\t")
+        counts[path] = count
+    return counts
 
 def main():
     runner = InteractiveRunner("Pull Request Checkout Test")
@@ -39,28 +57,13 @@ def main():
         print_green(f"[-] Initializing in {env.test_dir}...")
         env.run_mstl_cmd(["init", "-f", "mistletoe.json", "--ignore-stdin", "--verbose"])
 
-        print_green("[-] Configuring dummy git user...")
-        for repo in env.repo_names:
-             r_dir = os.path.join(env.test_dir, repo)
-             subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-             subprocess.run(["git", "config", "user.name", "Test User"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-
         print_green("[-] Switching to feature/checkout-test...")
         env.run_mstl_cmd(["switch", "-c", "feature/checkout-test", "--verbose"])
 
         print_green("[-] Making commits...")
-        for repo in env.repo_names:
-            r_dir = os.path.join(env.test_dir, repo)
-            with open(os.path.join(r_dir, "test.txt"), "w") as f:
-                f.write("test content")
-            subprocess.run(["git", "add", "."], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-            subprocess.run(["git", "commit", "-m", "Add test.txt"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-
-            # Make a second commit so depth=1 is distinguishable
-            with open(os.path.join(r_dir, "test2.txt"), "w") as f:
-                f.write("test content 2")
-            subprocess.run(["git", "add", "."], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-            subprocess.run(["git", "commit", "-m", "Add test2.txt"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+        env.commit_test_file("test.txt", "test content", "Add test.txt")
+        # Make a second commit so depth=1 is distinguishable
+        env.commit_test_file("test2.txt", "test content 2", "Add test2.txt")
 
 
         print_green("[-] Running 'pr create' to setup PRs...")
@@ -69,25 +72,30 @@ def main():
 
         # Retrieve PR URL for Repo A
         print_green(f"[-] retrieving PR URL for {repo_a}...")
+        # Query the pulls endpoint directly; the filter goes in the URL because
+        # passing it with -F would turn the request into a POST.
         res = subprocess.run(
-            ["gh", "pr", "list", "--repo", f"{env.user}/{repo_a}", "--head", "feature/checkout-test", "--json", "url", "--jq", ".[0].url"],
+            [GH, "api", f"/repos/{env.user}/{repo_a}/pulls?head={env.user}:feature/checkout-test&per_page=1"],
             capture_output=True, text=True, check=True
         )
-        pr_url = res.stdout.strip()
+        prs = json.loads(res.stdout)
+        if not prs:
+            print_green(f"[FATAL] 'pr create' opened no pull request for {repo_a} from feature/checkout-test")
+            raise RuntimeError(f"No pull request found for {repo_a}")
+        pr_url = prs[0]["html_url"]
         print_green(f"    PR URL: {pr_url}")
 
         # Checkout Normal
         checkout_dest = os.path.join(env.cwd, "pr_checkout")
-        if os.path.exists(checkout_dest):
-            shutil.rmtree(checkout_dest)
+        # Leftovers from an earlier run are renamed aside and deleted in the background
+        discard_tree(checkout_dest)
 
         print_green(f"[-] Running 'pr checkout' to {checkout_dest}...")
         env.run_mstl_cmd(["pr", "checkout", "-u", pr_url, "--dest", checkout_dest, "--verbose"], cwd=env.cwd)
 
         # Checkout Shallow
         checkout_dest_shallow = os.path.join(env.cwd, "pr_checkout_shallow")
-        if os.path.exists(checkout_dest_shallow):
-            shutil.rmtree(checkout_dest_shallow)
+        discard_tree(checkout_dest_shallow)
 
         print_green(f"[-] Running 'pr checkout --depth 1' to {checkout_dest_shallow}...")
         env.run_mstl_cmd(["pr", "checkout", "-u", pr_url, "--dest", checkout_dest_shallow, "--depth", "1", "--verbose"], cwd=env.cwd)
@@ -97,12 +105,19 @@ def main():
         print_green(f"[-] Verified checkout destinations")
 
         # Verify Depth
-        for repo in env.repo_names:
-             shallow_repo = os.path.join(checkout_dest_shallow, repo)
-             if os.path.exists(shallow_repo):
-                 # Check commit count
-                 res = subprocess.run(["git", "rev-list", "--count", "HEAD"], cwd=shallow_repo, capture_output=True, text=True)
-                 count = res.stdout.strip()
+        try:
+            with os.scandir(checkout_dest_shallow) as entries:
+                checked_out = {e.name for e in entries}
+        except FileNotFoundError:
+            checked_out = set()
+
+        # Check commit counts of all checked-out repositories in one process
+        shallow_repos = [os.path.join(checkout_dest_shallow, r) for r in env.repo_names]
+        counts = _commit_counts([d for r, d in zip(env.repo_names, shallow_repos) if r in checked_out])
+
+        for repo, shallow_repo in zip(env.repo_names, shallow_repos):
+             if repo in checked_out:
+                 count = counts.get(shallow_repo, "")
                  if count == "1":
                      print_green(f"    Success: {repo} is shallow (depth=1).")
                  else:
@@ -128,12 +143,10 @@ def main():
     def cleanup_with_dest():
         env.cleanup()
         dest_dir = os.path.join(env.cwd, "pr_checkout")
-        if os.path.exists(dest_dir):
-            shutil.rmtree(dest_dir)
+        fast_rmtree(dest_dir)
         dest_dir_shallow = os.path.join(env.cwd, "pr_checkout_shallow")
-        if os.path.exists(dest_dir_shallow):
-            shutil.rmtree(dest_dir_shallow)
-            print_green("[-] Deleted ./pr_checkout*")
+        fast_rmtree(dest_dir_shallow)
+        print_green("[-] Deleted ./pr_checkout*")
 
     runner.run_cleanup(cleanup_with_dest)
 
@@ -1,8 +1,5 @@
 #!/usr/bin/env python3
-import os
 import sys
-# Ensure manual_tests directory is in python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gh_test_env import GhTestEnv
 from interactive_runner import InteractiveRunner, print_green
@@ -39,28 +36,13 @@ def main():
         print_green(f"[-] Initializing in {env.test_dir}...")
         env.run_mstl_cmd(["init", "-f", "mistletoe.json", "--ignore-stdin", "--verbose"])
 
-        # Configure git user for the cloned repos (required for subsequent commits)
-        print_green("[-] Configuring dummy git user for cloned repositories...")
-        import subprocess
-        for repo in env.repo_names:
-             r_dir = os.path.join(env.test_dir, repo)
-             subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-             subprocess.run(["git", "config", "user.name", "Test User"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-
         # Switch branch
         print_green("[-] Switching to feature/interactive-test-draft...")
         env.run_mstl_cmd(["switch", "-c", "feature/interactive-test-draft", "--verbose"])
 
         # Make changes
         print_green("[-] Making commits to repositories...")
-        for repo in env.repo_names:
-            r_dir = os.path.join(env.test_dir, repo)
-            with open(os.path.join(r_dir, "test.txt"), "w") as f:
-                f.write("test content")
-            # We assume git is in path
-            import subprocess
-            subprocess.run(["git", "add", "."], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-            subprocess.run(["git", "commit", "-m", "Add test.txt"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+        env.commit_test_file("test.txt", "test content", "Add test.txt")
 
         print_green("[-] Running 'pr create' with --draft...")
         print_green("    (Please type 'yes' when prompted by the tool to create PRs)")
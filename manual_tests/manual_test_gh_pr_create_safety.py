@@ -1,28 +1,84 @@
 import os
 import subprocess
-import time
 import shutil
 import json
 import sys
 import pty
-import select
+import selectors
 import termios
 import tty
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green
+from local_repo_env import GIT, create_bare_repo, discard_tree, run_git, write_git_user
+
 
 def run_command(cmd, cwd=None, env=None):
-    """Run a shell command and check for errors."""
+    """Run a command given as an argument list and check for errors."""
     try:
         # Use simple subprocess for setup commands
-        subprocess.run(cmd, check=True, cwd=cwd, env=env, shell=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        subprocess.run(cmd, check=True, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
     except subprocess.CalledProcessError as e:
         print_green(f"Error running command: {cmd}")
         print_green(f"Stderr: {e.stderr.decode()}")
         sys.exit(1)
 
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+_MSTL_GH_BIN = os.path.abspath(os.path.join(_SCRIPT_DIR, "../bin/mstl-gh"))
+if sys.platform == "win32":
+    _MSTL_GH_BIN += ".exe"
+
+# Stand-in for gh that mstl-gh finds first on PATH (see fixtures/fake_gh.sh)
+FAKE_GH_SCRIPT = os.path.join(_SCRIPT_DIR, "fixtures", "fake_gh.sh")
+
+REPO_A_URL = "https://github.com/example/repo-a"
+
+# $1 = git, $2 = bare remote (already created), $3 = working repository, $4 = origin URL
+_FIXTURE_SETUP_SCRIPT = """
+# mstl-gh pushes into this remote; keep git from packing or
+# collecting garbage there afterwards, and store each received pack as is
+# instead of exploding it into loose objects.
+printf '[receive]\\n\\tautogc = false\\n[gc]\\n\\tauto = 0\\n[transfer]\\n\\tunpackLimit = 1\\n' >> "$2/config"
+# Commit 1 is written straight into the remote and then cloned, so no push
+# is needed; the clone also sets up origin/main and its tracking.
+blob=$(printf '%s' 'content 1' | "$1" --git-dir "$2" hash-object -w --stdin)
+tree=$(printf '100644 blob %s\\tfile.txt\\n' "$blob" | "$1" --git-dir "$2" mktree)
+commit=$("$1" --git-dir "$2" -c user.email=test@example.com -c user.name='Test User' commit-tree "$tree" -m 'commit 1')
+"$1" --git-dir "$2" update-ref refs/heads/main "$commit"
+"$1" clone -q --local "$2" "$3"
+"$1" -C "$3" remote set-url origin "$4"
+"""
+
+def _create_repo_fixture(remote_dir, repo_dir, env):
+    """
+    Creates the fixture repositories at the given paths: a bare remote holding
+    'commit 1' on main, and a clone of it whose origin is REPO_A_URL with
+    main tracking origin/main. Every git command runs with env.
+    """
+    # One shell runs the whole git setup instead of a Python round trip per command.
+    # Paths and the URL are passed as positional arguments, so nothing needs quoting.
+    create_bare_repo(remote_dir, env=env)
+    run_command(["sh", "-e", "-c", _FIXTURE_SETUP_SCRIPT, "sh", GIT, remote_dir, repo_dir, REPO_A_URL], env=env)
+    # Later commits in repo A use this identity
+    write_git_user(repo_dir)
+
+class _StreamMatcher:
+    """
+    Tracks whether needle has appeared in a byte stream fed in chunks. Only the
+    last len(needle) - 1 bytes are kept between chunks, enough to catch a match
+    split across two reads.
+    """
+    def __init__(self, needle):
+        self.needle = needle
+        self.found = False
+        self._tail = b""
+
+    def feed(self, data):
+        if not self.found:
+            window = self._tail + data
+            self.found = self.needle in window
+            self._tail = window[max(0, len(window) - len(self.needle) + 1):]
+        return self.found
+
 def main():
     runner = InteractiveRunner("'pr create' Safety Check Test")
     runner.parse_args()
@@ -31,10 +87,10 @@ def main():
     test_dir_ptr = {"path": None}
 
     def cleanup():
-        if test_dir_ptr["path"] and os.path.exists(test_dir_ptr["path"]):
+        if test_dir_ptr["path"]:
             print_green("Cleaning up temporary directory...")
             try:
-                shutil.rmtree(test_dir_ptr["path"])
+                discard_tree(test_dir_ptr["path"])
             except Exception as e:
                 print(f"Cleanup failed: {e}")
 
@@ -45,17 +101,13 @@ def main():
         test_dir = os.path.abspath("test_safety_env")
         test_dir_ptr["path"] = test_dir
 
-        if os.path.exists(test_dir):
-            shutil.rmtree(test_dir)
+        discard_tree(test_dir)
         os.makedirs(test_dir)
 
         print_green(f"Test directory: {test_dir}")
 
         # Use pre-built mstl-gh
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        mstl_gh_bin = os.path.abspath(os.path.join(script_dir, "../bin/mstl-gh"))
-        if sys.platform == "win32":
-            mstl_gh_bin += ".exe"
+        mstl_gh_bin = _MSTL_GH_BIN
 
         if not os.path.exists(mstl_gh_bin):
             print_green(f"[ERROR] mstl-gh binary not found at {mstl_gh_bin}. Please run build_all.sh first.")
@@ -63,86 +115,44 @@ def main():
 
         print_green(f"Using mstl-gh: {mstl_gh_bin}")
 
-        # Create Bare Remote Repo
-        remote_dir = os.path.join(test_dir, "remote-a.git")
-        os.makedirs(remote_dir)
-        run_command("git init --bare", cwd=remote_dir)
+        # Only what mstl-gh, git and the fake gh need, instead of a copy of the
+        # whole parent environment; used for the setup git commands as well.
+        # LANG=C also keeps git messages in English, and GIT_CONFIG_NOSYSTEM
+        # with HOME=test_dir keeps system and user git config out of the test.
+        env = {
+            "PATH": test_dir + os.pathsep + os.environ["PATH"],
+            "HOME": test_dir,
+            "LANG": "C",
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_CONFIG_NOSYSTEM": "1",
+        }
+        if "TERM" in os.environ:
+            env["TERM"] = os.environ["TERM"]
 
-        # Create Local Repo A
+        # Create the pre-pushed remote and local repo A
+        remote_dir = os.path.join(test_dir, "remote-a.git")
         repo_a_dir = os.path.join(test_dir, "repo-a")
-        os.makedirs(repo_a_dir)
-        run_command("git init", cwd=repo_a_dir)
-        run_command("git config user.email 'test@example.com'", cwd=repo_a_dir)
-        run_command("git config user.name 'Test User'", cwd=repo_a_dir)
-
-        repo_url = "https://github.com/example/repo-a"
-        run_command(f"git remote add origin {repo_url}", cwd=repo_a_dir)
+        _create_repo_fixture(remote_dir, repo_a_dir, env)
 
+        repo_url = REPO_A_URL
         remote_url_file = "file://" + remote_dir.replace("\\", "/")
 
         # Use Local Config for insteadOf
-        run_command(f"git config url.\"{remote_url_file}\".insteadOf \"{repo_url}\"", cwd=repo_a_dir)
-
-        # Initial content and push to remote
-        with open(os.path.join(repo_a_dir, "file.txt"), "w") as f:
-            f.write("content 1")
-        run_command("git add .", cwd=repo_a_dir)
-        run_command("git branch -M main", cwd=repo_a_dir)
-        run_command("git commit -m 'commit 1'", cwd=repo_a_dir)
-
-        # Push initial state
-        run_command("git push -u origin main", cwd=repo_a_dir)
+        with open(os.path.join(repo_a_dir, ".git", "config"), "a") as f:
+            f.write(f'[url "{remote_url_file}"]\n\tinsteadOf = {repo_url}\n')
 
         # Make Commit 2 (So we are Ahead)
         with open(os.path.join(repo_a_dir, "file.txt"), "a") as f:
             f.write("\ncontent 2")
-        run_command("git add .", cwd=repo_a_dir)
-        run_command("git commit -m 'commit 2'", cwd=repo_a_dir)
+        # file.txt is already tracked, so committing it by path skips the separate 'git add'
+        run_git(["-C", repo_a_dir, "commit", "-q", "-m", "commit 2", "--", "file.txt"], check=True, env=env, stdout=subprocess.DEVNULL)
 
         # Create fake gh
         fake_gh = os.path.join(test_dir, "gh")
-        gh_script_content = """#!/usr/bin/env python3
-import sys
-import json
-import time
-
-args = sys.argv[1:]
-
-if "auth" in args and "status" in args:
-    print("Logged in to github.com as testuser")
-    sys.exit(0)
-
-if "--version" in args:
-    print("gh version 2.0.0")
-    sys.exit(0)
-
-if "pr" in args and "list" in args:
-    # Simulate network delay slightly to ensure table renders first
-    time.sleep(0.5)
-    print("[]")
-    sys.exit(0)
-
-if "repo" in args and "view" in args:
-    if "-q" in args:
-        idx = args.index("-q")
-        if idx + 1 < len(args):
-            query = args[idx+1]
-            if ".viewerPermission" in query:
-                print("WRITE")
-                sys.exit(0)
-    print(json.dumps({"viewerPermission": "WRITE"}))
-    sys.exit(0)
-
-print("")
-sys.exit(0)
-"""
-        with open(fake_gh, "w") as f:
-            f.write(gh_script_content)
-        run_command(f"chmod +x {fake_gh}")
-
-        env = os.environ.copy()
-        env["PATH"] = test_dir + os.pathsep + env["PATH"]
-        env["HOME"] = test_dir
+        if sys.platform == "win32":
+            shutil.copy(FAKE_GH_SCRIPT, fake_gh)
+        else:
+            os.symlink(FAKE_GH_SCRIPT, fake_gh)
 
         # Create config
         config = {
@@ -156,14 +166,14 @@ sys.exit(0)
         }
 
         config_path = os.path.join(test_dir, "mistletoe.json")
-        with open(config_path, "w") as f:
-            json.dump(config, f)
+        with open(config_path, "wb") as f:
+            f.write(json.dumps(config, separators=(",", ":")).encode())
 
         # Create .mstl directory and dependency-graph.md
         mstl_dir = os.path.join(test_dir, ".mstl")
-        os.makedirs(mstl_dir, exist_ok=True)
-        with open(os.path.join(mstl_dir, "dependency-graph.md"), "w") as f:
-            f.write("graph TD\nrepo-a")
+        os.mkdir(mstl_dir)
+        with open(os.path.join(mstl_dir, "dependency-graph.md"), "wb") as f:
+            f.write(b"graph TD\nrepo-a")
 
         # Run mstl-gh pr create with PTY
         print_green("Running mstl-gh pr create (--verbose)...")
@@ -193,65 +203,102 @@ sys.exit(0)
             stderr=slave_fd,
             cwd=test_dir,
             env=env,
-            close_fds=True
+            # Every descriptor Python opens, the PTY master included, is
+            # non-inheritable already, so skip the close-all pass in the child.
+            close_fds=False
         )
         os.close(slave_fd) # Close slave in parent
 
         injected = False
-        output_buffer = ""
+        # The output is matched as it streams in rather than kept for a final scan
+        prompt_matcher = _StreamMatcher(b"Proceed with Push")
+        error_matcher = _StreamMatcher(b"has changed since status collection")
         prompt_detected = False
 
+        # Block until there is output or input instead of polling. The end of
+        # the process shows up as EIO (Linux) or EOF on the master side, after
+        # everything it wrote has been read. Both descriptors are registered
+        # once (epoll on Linux) rather than passed in on every wakeup.
+        stdin_fd = sys.stdin.fileno()
+        sel = selectors.DefaultSelector()
         try:
-            while process.poll() is None:
-                # Select on master_fd and sys.stdin
-                r, w, e = select.select([master_fd, sys.stdin], [], [], 0.1)
-
-                if master_fd in r:
-                    try:
-                        data = os.read(master_fd, 1024)
-                        if data:
-                            # Forward output to user's stdout
-                            os.write(sys.stdout.fileno(), data)
-                            output_buffer += data.decode('utf-8', errors='replace')
-
-                            # Check for Prompt
-                            if not injected and "Proceed with Push" in output_buffer:
-                                if not prompt_detected:
-                                    prompt_detected = True
-                                    print_green("\n[TEST] Prompt detected! Injecting race condition (new commit)...")
-
-                                    # Inject Change! (Commit 3)
-                                    with open(os.path.join(repo_a_dir, "file2.txt"), "w") as f:
-                                        f.write("content 3")
-                                    run_command("git add .", cwd=repo_a_dir)
-                                    run_command("git commit -m 'commit 3'", cwd=repo_a_dir)
-
-                                    print_green("[TEST] Change injected. PLEASE TYPE 'yes' TO CONTINUE.")
-                                    injected = True
-
-                                    if runner.args and runner.args.yes:
-                                        print_green("[AUTO-YES] Sending 'yes' to PTY...")
-                                        os.write(master_fd, b"yes\n")
-
-                    except OSError:
-                        break # Process closed
-
-                if sys.stdin in r:
+            sel.register(stdin_fd, selectors.EVENT_READ)
+        except PermissionError:
+            # epoll rejects regular files and /dev/null as stdin; select() takes them
+            sel.close()
+            sel = selectors.SelectSelector()
+            sel.register(stdin_fd, selectors.EVENT_READ)
+        sel.register(master_fd, selectors.EVENT_READ)
+        # Non-blocking, so each wakeup can drain everything that is buffered
+        os.set_blocking(master_fd, False)
+        try:
+            while True:
+                ready = {key.fd for key, _ in sel.select()}
+
+                if master_fd in ready:
+                    chunks = []
+                    closed = False
+                    while True:
+                        try:
+                            data = os.read(master_fd, 65536)
+                        except BlockingIOError:
+                            break
+                        except OSError:
+                            closed = True # Process closed
+                            break
+                        if not data:
+                            closed = True
+                            break
+                        chunks.append(data)
+
+                    if chunks:
+                        # Forward output to user's stdout in one call
+                        os.writev(sys.stdout.fileno(), chunks)
+                        for data in chunks:
+                            error_matcher.feed(data)
+                            prompt_matcher.feed(data)
+
+                    # Check for Prompt
+                    if prompt_matcher.found and not injected:
+                        if not prompt_detected:
+                            prompt_detected = True
+                            print_green("\n[TEST] Prompt detected! Injecting race condition (new commit)...")
+
+                            # Inject Change! (Commit 3)
+                            with open(os.path.join(repo_a_dir, "file2.txt"), "w") as f:
+                                f.write("content 3")
+                            run_git(["-C", repo_a_dir, "add", "file2.txt"], check=True, env=env, stdout=subprocess.DEVNULL)
+                            run_git(["-C", repo_a_dir, "commit", "-q", "-m", "commit 3"], check=True, env=env, stdout=subprocess.DEVNULL)
+
+                            print_green("[TEST] Change injected. PLEASE TYPE 'yes' TO CONTINUE.")
+                            injected = True
+
+                            if runner.args and runner.args.yes:
+                                print_green("[AUTO-YES] Sending 'yes' to PTY...")
+                                os.write(master_fd, b"yes\n")
+
+                    if closed:
+                        break
+
+                if stdin_fd in ready:
                     # Forward user input to process (PTY)
-                    d = os.read(sys.stdin.fileno(), 1024)
-                    os.write(master_fd, d)
-
+                    d = os.read(stdin_fd, 65536)
+                    if d:
+                        os.write(master_fd, d)
+                    else:
+                        # stdin is closed; stop watching it so the selector does not spin
+                        sel.unregister(stdin_fd)
         except OSError:
             pass
         finally:
+            sel.close()
             os.close(master_fd)
             process.wait()
 
         # Check Result in Buffer
         print_green("\n--- Final Check ---")
 
-        expected_error = "has changed since status collection"
-        if expected_error in output_buffer:
+        if error_matcher.found:
             print_green("SUCCESS: Safety check triggered correctly.")
         else:
             print_green("FAILURE: Safety check did NOT trigger or message not found.")
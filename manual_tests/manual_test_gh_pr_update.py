@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
-import os
 import sys
+import json
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
-# Ensure manual_tests directory is in python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gh_test_env import GhTestEnv
 from interactive_runner import InteractiveRunner, print_green
+from local_repo_env import GH
+
 
 def main():
     runner = InteractiveRunner("Pull Request Update Test")
@@ -36,22 +37,11 @@ def main():
         print_green(f"[-] Initializing...")
         env.run_mstl_cmd(["init", "-f", "mistletoe.json", "--ignore-stdin", "--verbose"])
 
-        print_green("[-] Configuring git user...")
-        for repo in env.repo_names:
-             r_dir = os.path.join(env.test_dir, repo)
-             subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-             subprocess.run(["git", "config", "user.name", "Test User"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-
         print_green("[-] Switching to feature/update-test...")
         env.run_mstl_cmd(["switch", "-c", "feature/update-test", "--verbose"])
 
         print_green("[-] Making commits...")
-        for repo in env.repo_names:
-            r_dir = os.path.join(env.test_dir, repo)
-            with open(os.path.join(r_dir, "test.txt"), "w") as f:
-                f.write("test content")
-            subprocess.run(["git", "add", "."], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-            subprocess.run(["git", "commit", "-m", "Add test.txt"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+        env.commit_test_file("test.txt", "test content", "Add test.txt")
 
         print_green("[-] Running 'pr create'...")
         env.run_mstl_cmd(["pr", "create", "-t", "Update Test PR", "-b", "Body", "--dependencies", "dependency-graph.md", "--verbose"])
@@ -69,29 +59,49 @@ def main():
         #     B --> C
         # ```
 
-        lines = content.splitlines()
-        # Find the last line that starts with ```
-        end_idx = -1
-        for i in range(len(lines)-1, -1, -1):
-            if lines[i].strip().startswith("```"):
-                end_idx = i
-                break
-
-        if end_idx != -1:
-             lines.insert(end_idx, f"    {repo_d} --> {repo_a}")
+        # Splice the new edge in front of the line holding the last ``` fence
+        edge = f"    {repo_d} --> {repo_a}\n"
+        fence_idx = content.rfind("```")
+        if fence_idx != -1:
+            line_start = content.rfind("\n", 0, fence_idx) + 1
+            content = content[:line_start] + edge + content[line_start:]
         else:
-             lines.append(f"    {repo_d} --> {repo_a}")
+            if content and not content.endswith("\n"):
+                content += "\n"
+            content += edge
 
         with open(env.dependency_file, "w") as f:
-            f.write("\n".join(lines) + "\n")
+            f.write(content)
 
         print_green("[-] Running 'pr update'...")
         # pr update updates existing PRs
         env.run_mstl_cmd(["pr", "update", "--dependencies", "dependency-graph.md", "--verbose"])
 
-        # Display PR URLs for verification
-        print_green(f"[-] Please verify the PR for Repo D ({repo_d}):")
-        subprocess.run(["gh", "pr", "list", "--repo", f"{env.user}/{repo_d}", "--head", "feature/update-test"], check=True)
+        # Display the PRs of every repository for verification. The gh calls run
+        # concurrently and their output is printed afterwards in repository order.
+        # Captured gh output is plain tab-separated text, so the fields are
+        # requested as JSON and laid out here, body included for the block check.
+        def list_prs(repo):
+            try:
+                res = subprocess.run(
+                    [GH, "pr", "list", "--repo", f"{env.user}/{repo}", "--head", "feature/update-test",
+                     "--json", "number,title,url,body"],
+                    check=True, capture_output=True, text=True
+                )
+            except subprocess.CalledProcessError as e:
+                return f"    Failed to list PRs: {e.stderr.strip()}\n"
+            prs = json.loads(res.stdout)
+            if not prs:
+                return "    No PRs found.\n"
+            return "".join(f"#{pr['number']}  {pr['title']}  {pr['url']}\n{pr['body']}\n\n" for pr in prs)
+        with ThreadPoolExecutor(max_workers=len(env.repo_names)) as executor:
+            pr_lists = list(executor.map(list_prs, env.repo_names))
+        for repo, pr_list in zip(env.repo_names, pr_lists):
+            if repo == repo_d:
+                print_green(f"[-] Please verify the PR for Repo D ({repo_d}):")
+            else:
+                print_green(f"[-] PRs for {repo}:")
+            print(pr_list, end="")
 
     expected = (
         f"1. PRs created for all 4 repos.\n"
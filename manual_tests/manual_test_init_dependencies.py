@@ -7,13 +7,11 @@ import os
 import shutil
 import tempfile
 import subprocess
-import json
 import sys
 import atexit
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
+from local_repo_env import create_bare_repo, discard_tree, mstl_binary, output_contains, scratch_parent, write_config
 
 def log_header(msg):
     print_green(f"=== {msg} ===")
@@ -25,21 +23,35 @@ def log_fail(msg):
     print_red(f"[FAIL] {msg}")
     sys.exit(1)
 
+# A small fixed environment for mstl and the git it runs, instead of the whole
+# parent environment. Windows needs more of its own variables, so it inherits.
+_COMMAND_ENV = None if sys.platform == "win32" else {
+    "PATH": os.environ.get("PATH", "/usr/bin:/bin"),
+    "HOME": os.environ.get("HOME", "/"),
+    "LANG": "C",
+    "GIT_TERMINAL_PROMPT": "0",
+    "GIT_CONFIG_NOSYSTEM": "1",
+}
+
 def run_command(cmd, cwd=None, expect_error=False):
-    """Runs a shell command and returns the exit code and output."""
+    """
+    Runs a command and returns the exit code and its stdout and stderr as bytes.
+    Output is left undecoded; callers search it with bytes needles.
+    """
     try:
         result = subprocess.run(
             cmd,
             cwd=cwd,
+            env=_COMMAND_ENV,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            universal_newlines=True,
+            close_fds=False,
             check=False
         )
         return result.returncode, result.stdout, result.stderr
     except Exception as e:
         print(f"Error running command: {e}")
-        return -1, "", str(e)
+        return -1, b"", str(e).encode()
 
 class InitDependenciesTest:
     def __init__(self):
@@ -50,54 +62,43 @@ class InitDependenciesTest:
         if self.root_dir and os.path.exists(self.root_dir):
             print_green("Cleaning up temporary directory...")
             try:
-                shutil.rmtree(self.root_dir)
+                discard_tree(self.root_dir)
             except Exception as e:
                 print(f"Cleanup failed: {e}")
 
     def run(self):
         # Setup temporary directory
-        self.root_dir = tempfile.mkdtemp(prefix="mstl_manual_test_deps_")
+        self.root_dir = tempfile.mkdtemp(prefix="mstl_manual_test_deps_", dir=scratch_parent())
         atexit.register(self.cleanup)
 
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.mstl_bin = os.path.abspath(os.path.join(script_dir, "../bin/mstl"))
-        if sys.platform == "win32":
-            self.mstl_bin += ".exe"
-
-        if not os.path.exists(self.mstl_bin):
-            log_fail(f"mstl binary not found at {self.mstl_bin}. Please run build_all.sh first.")
-
-        # Setup 3 bare repos
-        repos = {}
-        for name in ["repoA", "repoB", "repoC"]:
-            repo_path = os.path.join(self.root_dir, name)
-            os.makedirs(repo_path)
-            subprocess.run(["git", "init", "--bare"], cwd=repo_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-            # Set default branch
-            subprocess.run(["git", "-C", repo_path, "symbolic-ref", "HEAD", "refs/heads/main"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-            repos[name] = repo_path
+        # Uses the binary build_all.sh keeps up to date, never building here
+        try:
+            self.mstl_bin = mstl_binary()
+        except Exception as e:
+            log_fail(str(e))
+
+        # Setup 3 bare repos. Only repoA is made by git; the other two are
+        # hard-linked copies of it, which is safe because nothing in this test
+        # writes to the remotes.
+        repo_names = ["repoA", "repoB", "repoC"]
+        repos = {name: os.path.join(self.root_dir, name) for name in repo_names}
+        create_bare_repo(repos["repoA"])
+        for name in repo_names[1:]:
+            shutil.copytree(repos["repoA"], repos[name], copy_function=os.link)
 
         # Create config.json
         config_path = os.path.join(self.root_dir, "config.json")
-        config = {
-            "repositories": [
-                {"id": "repoA", "url": "file://" + repos["repoA"]},
-                {"id": "repoB", "url": "file://" + repos["repoB"]},
-                {"id": "repoC", "url": "file://" + repos["repoC"]}
-            ]
-        }
-        with open(config_path, "w") as f:
-            json.dump(config, f)
+        write_config(config_path, [{"id": name, "url": "file://" + repos[name]} for name in repo_names])
 
         # Create valid dependency graph
         dep_path = os.path.join(self.root_dir, "dep.md")
-        with open(dep_path, "w") as f:
-            f.write("```mermaid\ngraph TD\n    repoA --> repoB\n    repoB --> repoC\n```\n")
+        with open(dep_path, "wb") as f:
+            f.write(b"```mermaid\ngraph TD\n    repoA --> repoB\n    repoB --> repoC\n```\n")
 
         # Create invalid dependency graph (syntax ok, invalid ID)
         invalid_dep_path = os.path.join(self.root_dir, "invalid_dep.md")
-        with open(invalid_dep_path, "w") as f:
-            f.write("```mermaid\ngraph TD\n    repoA --> repoZ\n```\n")
+        with open(invalid_dep_path, "wb") as f:
+            f.write(b"```mermaid\ngraph TD\n    repoA --> repoZ\n```\n")
 
         # Test Case 1: Valid dependencies
         log_header("Test Case 1: Init with valid dependencies")
@@ -114,7 +115,7 @@ class InitDependenciesTest:
 
         code, out, err = run_command(cmd)
         if code != 0:
-            log_fail(f"Init failed for valid deps. Code: {code}, Output: {out}, Error: {err}")
+            log_fail(f"Init failed for valid deps. Code: {code}, Output: {out.decode(errors='replace')}, Error: {err.decode(errors='replace')}")
 
         # Check .mstl/dependency-graph.md
         dep_output = os.path.join(dest_dir_valid, ".mstl", "dependency-graph.md")
@@ -142,10 +143,10 @@ class InitDependenciesTest:
         ]
 
         code, out, err = run_command(cmd)
-        if code != 0 and "Error validating dependency graph" in out + err and "not found in configuration" in out + err:
+        if code != 0 and output_contains(b"Error validating dependency graph", out, err) and output_contains(b"not found in configuration", out, err):
             log_pass("Correctly failed when dependency graph contains invalid ID")
         else:
-            log_fail(f"Expected failure for invalid ID. Code: {code}, Output: {out}, Error: {err}")
+            log_fail(f"Expected failure for invalid ID. Code: {code}, Output: {out.decode(errors='replace')}, Error: {err.decode(errors='replace')}")
 
         # Test Case 3: Missing dependency file
         log_header("Test Case 3: Init with missing dependency file")
@@ -161,10 +162,10 @@ class InitDependenciesTest:
         ]
 
         code, out, err = run_command(cmd)
-        if code != 0 and "Error reading dependency file" in out + err:
+        if code != 0 and output_contains(b"Error reading dependency file", out, err):
             log_pass("Correctly failed when dependency file is missing")
         else:
-            log_fail(f"Expected failure for missing file. Code: {code}, Output: {out}, Error: {err}")
+            log_fail(f"Expected failure for missing file. Code: {code}, Output: {out.decode(errors='replace')}, Error: {err.decode(errors='replace')}")
 
         print_green("All tests passed.")
 
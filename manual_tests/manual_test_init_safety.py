@@ -2,25 +2,37 @@
 import os
 import sys
 import subprocess
-import shutil
 import tempfile
-import json
 from interactive_runner import InteractiveRunner
+from local_repo_env import create_bare_repo, discard_tree, mstl_binary, output_contains, scratch_parent, write_config
 
-def create_bare_repo(path):
-    """Creates a bare git repository."""
-    os.makedirs(path, exist_ok=True)
-    subprocess.run(["git", "init", "--bare", path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-    # Set default branch to main to avoid confusion
-    subprocess.run(["git", "-C", path, "symbolic-ref", "HEAD", "refs/heads/main"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+# Upper bound for one 'mstl init' run; a local file:// clone finishes in seconds
+INIT_TIMEOUT = 60
+
+def run_init(runner, cmd, input_text):
+    """
+    Runs cmd with input_text on stdin and returns (returncode, stdout, stderr).
+    A run exceeding INIT_TIMEOUT is killed and fails the test instead of hanging it.
+    """
+    try:
+        result = subprocess.run(cmd, input=input_text, capture_output=True, text=True, timeout=INIT_TIMEOUT, close_fds=False)
+    except subprocess.TimeoutExpired:
+        runner.fail(f"mstl init did not finish within {INIT_TIMEOUT} seconds: {cmd}")
+    return result.returncode, result.stdout, result.stderr
+
+def print_output(stdout, stderr):
+    """Shows a run's captured output in one write instead of four prints."""
+    sys.stdout.write(f"--- Stdout ---\n{stdout}\n--- Stderr ---\n{stderr}\n")
 
 def main():
     runner = InteractiveRunner("Manual Test: Init Safety Check")
     runner.parse_args()
 
     # Create temp directory
-    temp_dir = tempfile.mkdtemp(prefix="mstl-init-safety-")
+    temp_dir = tempfile.mkdtemp(prefix="mstl-init-safety-", dir=scratch_parent())
     print(f"Created temp directory: {temp_dir}")
+    # Sibling of temp_dir, so the set-aside clone is not seen as extra content by Test 3
+    test2_clone = temp_dir + "-test2-clone"
 
     try:
         # Create a dummy remote repo
@@ -28,14 +40,8 @@ def main():
         create_bare_repo(remote_repo_dir)
 
         # Create config.json
-        config = {
-            "repositories": [
-                {"url": f"file://{remote_repo_dir}", "id": "repo1"}
-            ]
-        }
         config_path = os.path.join(temp_dir, "config.json")
-        with open(config_path, "w") as f:
-            json.dump(config, f)
+        write_config(config_path, [{"url": f"file://{remote_repo_dir}", "id": "repo1"}])
 
         # Create an unexpected file
         unexpected_file = os.path.join(temp_dir, "garbage.txt")
@@ -45,23 +51,16 @@ def main():
         # Command to run init
         # We must use --ignore-stdin to prevent mstl from reading config from stdin,
         # which would consume the piped input intended for the prompt.
-        mstl_path = os.path.abspath("mstl")
-        if not os.path.exists(mstl_path):
-            # Try go run
-            cmd = ["go", "run", "cmd/mstl/main.go", "init", "-f", config_path, "--dest", temp_dir, "--ignore-stdin"]
-        else:
-            cmd = [mstl_path, "init", "-f", config_path, "--dest", temp_dir, "--ignore-stdin"]
+        # All three runs reuse the pre-built binary rather than compiling via 'go run'
+        mstl_path = mstl_binary()
+        cmd = [mstl_path, "init", "-f", config_path, "--dest", temp_dir, "--ignore-stdin"]
 
         print("Running init in a dirty directory...")
 
         print("Test 1: Rejecting the safety check (input 'n')")
-        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, stderr = p.communicate(input="n\n")
+        returncode, stdout, stderr = run_init(runner, cmd, "n\n")
 
-        print("--- Stdout ---")
-        print(stdout)
-        print("--- Stderr ---")
-        print(stderr)
+        print_output(stdout, stderr)
 
         if f"Current directory: {temp_dir}" in stdout:
              runner.log(f"Correct directory path displayed: {temp_dir}", status="SUCCESS")
@@ -73,49 +72,42 @@ def main():
         else:
             runner.fail("Safety warning NOT displayed.")
 
-        if "initialization aborted by user" in stderr or "initialization aborted by user" in stdout:
+        if output_contains("initialization aborted by user", stdout, stderr):
              runner.log("Initialization aborted correctly.", status="SUCCESS")
-        elif p.returncode != 0:
+        elif returncode != 0:
              runner.log("Process exited with error as expected.", status="SUCCESS")
         else:
              runner.fail("Process did not fail as expected.")
 
 
         print("Test 2: Accepting the safety check (input 'y')")
-        p = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, stderr = p.communicate(input="y\n")
+        returncode, stdout, stderr = run_init(runner, cmd, "y\n")
 
-        print("--- Stdout ---")
-        print(stdout)
-        print("--- Stderr ---")
-        print(stderr)
+        print_output(stdout, stderr)
 
         if "This directory contains files/directories not in the repository list" in stdout:
             runner.log("Safety warning displayed.", status="SUCCESS")
 
         if f"Cloning file://{remote_repo_dir}" in stdout or "Cloning..." in stdout:
              runner.log("Proceeded to clone after confirmation.", status="SUCCESS")
-        elif "Error" in stdout or "Error" in stderr:
+        elif output_contains("Error", stdout, stderr):
             # If it failed at clone step, we are good.
-            if "initialization aborted by user" not in stdout and "initialization aborted by user" not in stderr:
+            if not output_contains("initialization aborted by user", stdout, stderr):
                 runner.log("Passed safety check (failed later at clone as expected).", status="SUCCESS")
             else:
                 runner.fail("Aborted by user despite sending 'y'.")
 
         print("Test 3: Bypass safety check with --yes")
-        # Cleanup cloned repo from Test 2 to ensure Test 3 verifies clone behavior
-        shutil.rmtree(os.path.join(temp_dir, "repo1"))
+        # Move the clone from Test 2 out of the destination so Test 3 verifies clone
+        # behavior. A rename is enough here; it is discarded with everything else at the end.
+        os.rename(os.path.join(temp_dir, "repo1"), test2_clone)
 
         # Add --yes to the command
         cmd_yes = cmd + ["--yes"]
-        p = subprocess.Popen(cmd_yes, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        # No input provided to confirm prompt is skipped
-        stdout, stderr = p.communicate()
+        # No input provided (stdin is closed) to confirm prompt is skipped
+        returncode, stdout, stderr = run_init(runner, cmd_yes, "")
 
-        print("--- Stdout ---")
-        print(stdout)
-        print("--- Stderr ---")
-        print(stderr)
+        print_output(stdout, stderr)
 
         if "Are you sure you want to initialize in this directory?" in stdout:
              runner.fail("Prompt displayed despite --yes flag.")
@@ -127,14 +119,15 @@ def main():
 
         if f"Cloning file://{remote_repo_dir}" in stdout or "Cloning..." in stdout:
              runner.log("Proceeded to clone automatically.", status="SUCCESS")
-        elif "Error" in stdout or "Error" in stderr:
+        elif output_contains("Error", stdout, stderr):
             if "initialization aborted by user" not in stdout:
                 runner.log("Passed safety check (failed later at clone as expected).", status="SUCCESS")
             else:
                 runner.fail("Aborted by user unexpectedly.")
 
     finally:
-        shutil.rmtree(temp_dir)
+        discard_tree(temp_dir)
+        discard_tree(test2_clone)
         print("Cleaned up temp directory.")
 
 if __name__ == "__main__":
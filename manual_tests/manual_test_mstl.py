@@ -6,9 +6,9 @@ import subprocess
 import json
 import atexit
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
+from local_repo_env import GIT, create_bare_repo
+
 
 def log(msg):
     print_green(f"[TEST] {msg}")
@@ -87,47 +87,39 @@ class MstlManualTest:
                 fail(f"Command failed: {' '.join(cmd)}\nStderr: {e.stderr}\nStdout: {e.stdout}")
             return e
 
+    def seed_commit(self, bare_path, files, message, parent=None):
+        """Writes a commit holding files ({name: content}) straight into bare_path and returns its id."""
+        git = [GIT, "--git-dir", bare_path]
+        entries = []
+        for name, content in sorted(files.items()):
+            blob = self.run_cmd(git + ["hash-object", "-w", "--stdin"], input_str=content).stdout.strip()
+            entries.append(f"100644 blob {blob}\t{name}\n")
+        tree = self.run_cmd(git + ["mktree"], input_str="".join(entries)).stdout.strip()
+        cmd = git + ["commit-tree", tree, "-m", message]
+        if parent:
+            cmd += ["-p", parent]
+        return self.run_cmd(cmd).stdout.strip()
+
     def setup_remotes(self):
         log("Setting up remote repositories...")
         os.makedirs(self.remote_dir, exist_ok=True)
-        self.run_cmd(["git", "init", "--bare", os.path.join(self.remote_dir, "repo1.git")])
-        self.run_cmd(["git", "init", "--bare", os.path.join(self.remote_dir, "repo2.git")])
+        repo1_bare = os.path.join(self.remote_dir, "repo1.git")
+        repo2_bare = os.path.join(self.remote_dir, "repo2.git")
+        create_bare_repo(repo1_bare)
+        create_bare_repo(repo2_bare)
 
+        # Commits are written directly into the bare remotes, so no seed clone
+        # has to be checked out, committed in and pushed back.
         log("Seeding remotes...")
-        os.makedirs(self.seed_dir, exist_ok=True)
-
-        # Repo 1
-        self.run_cmd(["git", "clone", os.path.join(self.remote_dir, "repo1.git"), os.path.join(self.seed_dir, "repo1")])
-        repo1_seed = os.path.join(self.seed_dir, "repo1")
-        self.run_cmd(["git", "checkout", "-b", "main"], cwd=repo1_seed, check=False)
-
-        with open(os.path.join(repo1_seed, "README.md"), "w") as f:
-            f.write("# Repo 1")
-
-        self.run_cmd(["git", "add", "README.md"], cwd=repo1_seed)
-        self.run_cmd(["git", "commit", "-m", "Initial commit repo1"], cwd=repo1_seed)
 
-        # Add another commit to verify depth
-        with open(os.path.join(repo1_seed, "test.txt"), "w") as f:
-            f.write("test")
-        self.run_cmd(["git", "add", "test.txt"], cwd=repo1_seed)
-        self.run_cmd(["git", "commit", "-m", "Second commit repo1"], cwd=repo1_seed)
-
-        self.run_cmd(["git", "push", "origin", "main"], cwd=repo1_seed)
-        self.run_cmd(["git", "--git-dir", os.path.join(self.remote_dir, "repo1.git"), "symbolic-ref", "HEAD", "refs/heads/main"])
+        # Repo 1, with a second commit to verify depth
+        first = self.seed_commit(repo1_bare, {"README.md": "# Repo 1"}, "Initial commit repo1")
+        second = self.seed_commit(repo1_bare, {"README.md": "# Repo 1", "test.txt": "test"}, "Second commit repo1", parent=first)
+        self.run_cmd([GIT, "--git-dir", repo1_bare, "update-ref", "refs/heads/main", second])
 
         # Repo 2
-        self.run_cmd(["git", "clone", os.path.join(self.remote_dir, "repo2.git"), os.path.join(self.seed_dir, "repo2")])
-        repo2_seed = os.path.join(self.seed_dir, "repo2")
-        self.run_cmd(["git", "checkout", "-b", "main"], cwd=repo2_seed, check=False)
-
-        with open(os.path.join(repo2_seed, "README.md"), "w") as f:
-            f.write("# Repo 2")
-
-        self.run_cmd(["git", "add", "README.md"], cwd=repo2_seed)
-        self.run_cmd(["git", "commit", "-m", "Initial commit repo2"], cwd=repo2_seed)
-        self.run_cmd(["git", "push", "origin", "main"], cwd=repo2_seed)
-        self.run_cmd(["git", "--git-dir", os.path.join(self.remote_dir, "repo2.git"), "symbolic-ref", "HEAD", "refs/heads/main"])
+        commit = self.seed_commit(repo2_bare, {"README.md": "# Repo 2"}, "Initial commit repo2")
+        self.run_cmd([GIT, "--git-dir", repo2_bare, "update-ref", "refs/heads/main", commit])
 
     def create_config(self):
         log("Creating mstl configuration...")
@@ -171,7 +163,7 @@ class MstlManualTest:
         if not os.path.isdir(repo1_path):
              fail("repo1 not cloned in shallow dir")
 
-        res = self.run_cmd(["git", "rev-list", "--count", "HEAD"], cwd=repo1_path)
+        res = self.run_cmd([GIT, "rev-list", "--count", "HEAD"], cwd=repo1_path)
         count = res.stdout.strip()
         if count != "1":
             fail(f"repo1 depth is {count}, expected 1")
@@ -222,7 +214,7 @@ class MstlManualTest:
         self.run_cmd([self.bin_path, "switch", "-c", "feature/test-branch", "--verbose", "--ignore-stdin"], cwd=self.repos_dir)
 
         # Verify
-        res = self.run_cmd(["git", "symbolic-ref", "--short", "HEAD"], cwd=os.path.join(self.repos_dir, "repo1"))
+        res = self.run_cmd([GIT, "symbolic-ref", "--short", "HEAD"], cwd=os.path.join(self.repos_dir, "repo1"))
         if res.stdout.strip() != "feature/test-branch":
             fail(f"repo1 not on feature/test-branch (was {res.stdout.strip()})")
         log("Success: mstl switch -c")
@@ -233,8 +225,8 @@ class MstlManualTest:
         with open(os.path.join(repo1_path, "README.md"), "a") as f:
             f.write("\nChange in repo1")
 
-        self.run_cmd(["git", "add", "README.md"], cwd=repo1_path)
-        self.run_cmd(["git", "commit", "-m", "Update repo1"], cwd=repo1_path)
+        self.run_cmd([GIT, "add", "README.md"], cwd=repo1_path)
+        self.run_cmd([GIT, "commit", "-m", "Update repo1"], cwd=repo1_path)
 
         # Verify status shows unpushed (>)
         res = self.run_cmd([self.bin_path, "status", "--verbose", "--ignore-stdin"], cwd=self.repos_dir)
@@ -245,8 +237,7 @@ class MstlManualTest:
         self.run_cmd([self.bin_path, "push", "--verbose", "--ignore-stdin"], cwd=self.repos_dir, input_str="yes\n")
 
         # Verify remote
-        self.run_cmd(["git", "fetch", "origin"], cwd=os.path.join(self.seed_dir, "repo1")) # Use seed dir to check remote
-        res = self.run_cmd(["git", "log", "origin/feature/test-branch", "--oneline"], cwd=os.path.join(self.seed_dir, "repo1"))
+        res = self.run_cmd([GIT, "--git-dir", os.path.join(self.remote_dir, "repo1.git"), "log", "feature/test-branch", "--oneline"])
         if "Update repo1" not in res.stdout:
             fail("Remote repo1 does not have the pushed commit")
         log("Success: mstl push")
@@ -258,13 +249,14 @@ class MstlManualTest:
         self.run_cmd([self.bin_path, "switch", "main", "--ignore-stdin", "--verbose"], cwd=self.repos_dir)
 
         # Update remote repo2
+        # A --local clone hardlinks the remote's objects instead of packing them
         repo2_seed = os.path.join(self.seed_dir, "repo2")
-        self.run_cmd(["git", "checkout", "main"], cwd=repo2_seed)
+        self.run_cmd([GIT, "clone", "--local", "--branch", "main", os.path.join(self.remote_dir, "repo2.git"), repo2_seed])
         with open(os.path.join(repo2_seed, "README.md"), "a") as f:
             f.write("\nRemote Change repo2")
-        self.run_cmd(["git", "add", "README.md"], cwd=repo2_seed)
-        self.run_cmd(["git", "commit", "-m", "Remote update repo2"], cwd=repo2_seed)
-        self.run_cmd(["git", "push", "origin", "main"], cwd=repo2_seed)
+        self.run_cmd([GIT, "add", "README.md"], cwd=repo2_seed)
+        self.run_cmd([GIT, "commit", "-m", "Remote update repo2"], cwd=repo2_seed)
+        self.run_cmd([GIT, "push", "origin", "main"], cwd=repo2_seed)
 
         # Verify status shows pullable (<)
         res = self.run_cmd([self.bin_path, "status", "--verbose", "--ignore-stdin"], cwd=self.repos_dir)
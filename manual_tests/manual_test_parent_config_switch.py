@@ -1,80 +1,28 @@
 import os
-import shutil
 import subprocess
-import sys
-import json
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
-
-def setup_local_repos(base_dir):
-    repo_names = ["repo-a", "repo-b"]
-    repos = []
-
-    remotes_dir = os.path.join(base_dir, "remotes")
-    os.makedirs(remotes_dir, exist_ok=True)
-
-    for name in repo_names:
-        bare_path = os.path.join(remotes_dir, name + ".git")
-        os.makedirs(bare_path, exist_ok=True)
-        subprocess.run(["git", "init", "--bare"], cwd=bare_path, check=True, stdout=subprocess.DEVNULL)
-
-        tmp_clone = os.path.join(base_dir, "tmp_setup_" + name)
-        subprocess.run(["git", "clone", bare_path, tmp_clone], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-        # Configure user to avoid git errors
-        subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "config", "user.name", "Test User"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-
-        with open(os.path.join(tmp_clone, "README.md"), "w") as f:
-            f.write(f"# {name}")
-
-        subprocess.run(["git", "add", "."], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "Initial commit"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "branch", "-M", "master"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "push", "origin", "master"], cwd=tmp_clone, check=True, stdout=subprocess.DEVNULL)
-
-        shutil.rmtree(tmp_clone)
-
-        repo_work_dir = os.path.join(base_dir, name)
-        subprocess.run(["git", "clone", bare_path, repo_work_dir], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        repos.append({"id": name, "url": bare_path, "path": repo_work_dir})
-
-    return repos
+from local_repo_env import fast_rmtree, mstl_binary, setup_local_repos, write_config
 
 def run_test_logic():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    main_go_path = os.path.join(project_root, "cmd", "mstl", "main.go")
+    mstl_bin = mstl_binary()
 
     test_workspace = os.path.abspath("manual_test_workspace_repro")
-    if os.path.exists(test_workspace):
-        shutil.rmtree(test_workspace)
-    os.makedirs(test_workspace)
+    fast_rmtree(test_workspace)
+    os.mkdir(test_workspace)
 
     try:
         print_green("Setting up local test environment...")
-        repos = setup_local_repos(test_workspace)
+        repos = setup_local_repos(test_workspace, ["repo-a", "repo-b"])
 
         # Create .mstl config
         mstl_dir = os.path.join(test_workspace, ".mstl")
-        os.makedirs(mstl_dir, exist_ok=True)
-
-        config_repos = []
-        for r in repos:
-            config_repos.append({
-                "id": r["id"],
-                "url": r["url"],
-                "branch": "master"
-            })
+        os.mkdir(mstl_dir)
 
-        config = {"repositories": config_repos}
         config_path = os.path.join(mstl_dir, "config.json")
-        with open(config_path, "w") as f:
-            json.dump(config, f, indent=2)
+        write_config(config_path, [{"id": r["id"], "url": r["url"], "branch": "master"} for r in repos])
 
-        cmd_base = ["go", "run", main_go_path]
+        cmd_base = [mstl_bin]
 
         # We run from repo-a.
         # Config is in parent.
@@ -108,8 +56,7 @@ def run_test_logic():
              raise Exception("repo-b NOT found in status output. The CWD switch might have failed.")
 
     finally:
-        if os.path.exists(test_workspace):
-            shutil.rmtree(test_workspace)
+        fast_rmtree(test_workspace)
 
 def main():
     runner = InteractiveRunner("Parent Config CWD Switch Test")
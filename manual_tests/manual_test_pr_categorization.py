@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import os
 import sys
-# Ensure manual_tests directory is in python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import subprocess
 
 from gh_test_env import GhTestEnv
 from interactive_runner import InteractiveRunner, print_green
+from local_repo_env import GIT, write_git_user
+
 
 def main():
     runner = InteractiveRunner("Multi-Repo Pull Request Categorization Test")
@@ -43,11 +44,9 @@ def main():
 
         # Configure git user for the cloned repos
         print_green("[-] Configuring dummy git user for cloned repositories...")
-        import subprocess
         for repo in env.repo_names:
              r_dir = os.path.join(env.test_dir, repo)
-             subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-             subprocess.run(["git", "config", "user.name", "Test User"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+             write_git_user(r_dir)
 
         # --------------------------------------------------------------------------------
         # Prepare Scenarios
@@ -59,18 +58,18 @@ def main():
 
         # Repo A: Push + Create (New commits, not pushed)
         r_a = os.path.join(env.test_dir, repo_a)
-        subprocess.run(["git", "checkout", "-b", branch_name], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "checkout", "-b", branch_name], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
         with open(os.path.join(r_a, "change.txt"), "w") as f: f.write("new content")
-        subprocess.run(["git", "add", "."], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "New feature"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "add", "."], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "commit", "-m", "New feature"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
 
         # Repo B: No Push + Create (Commits pushed, no PR)
         r_b = os.path.join(env.test_dir, repo_b)
-        subprocess.run(["git", "checkout", "-b", branch_name], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "checkout", "-b", branch_name], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
         with open(os.path.join(r_b, "change.txt"), "w") as f: f.write("new content")
-        subprocess.run(["git", "add", "."], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "New feature"], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "push", "-u", "origin", branch_name], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "add", "."], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "commit", "-m", "New feature"], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "push", "-u", "origin", branch_name], cwd=r_b, check=True, stdout=subprocess.DEVNULL)
 
         # Repo C: Push + Update (New commits, not pushed, PR exists)
         # Note: We cannot easily mock "PR Exists" for real GitHub without creating one.
@@ -88,18 +87,18 @@ def main():
 
         # Repo C: Set up as "Push + Create" as well, just to distinguish.
         r_c = os.path.join(env.test_dir, repo_c)
-        subprocess.run(["git", "checkout", "-b", branch_name], cwd=r_c, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "checkout", "-b", branch_name], cwd=r_c, check=True, stdout=subprocess.DEVNULL)
         with open(os.path.join(r_c, "change.txt"), "w") as f: f.write("new content")
-        subprocess.run(["git", "add", "."], cwd=r_c, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "New feature"], cwd=r_c, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "add", "."], cwd=r_c, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "commit", "-m", "New feature"], cwd=r_c, check=True, stdout=subprocess.DEVNULL)
 
         # Repo D: Set up as "No Push + Create" as well.
         r_d = os.path.join(env.test_dir, repo_d)
-        subprocess.run(["git", "checkout", "-b", branch_name], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "checkout", "-b", branch_name], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
         with open(os.path.join(r_d, "change.txt"), "w") as f: f.write("new content")
-        subprocess.run(["git", "add", "."], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "New feature"], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "push", "-u", "origin", branch_name], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "add", "."], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "commit", "-m", "New feature"], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "push", "-u", "origin", branch_name], cwd=r_d, check=True, stdout=subprocess.DEVNULL)
 
         print_green("[-] Running 'pr create'...")
         print_green("    Verify the output categorizes repositories correctly:")
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 import os
 import sys
-# Ensure manual_tests directory is in python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import subprocess
 
 from gh_test_env import GhTestEnv
 from interactive_runner import InteractiveRunner, print_green
+from local_repo_env import GIT, write_git_user
+
 
 def main():
     runner = InteractiveRunner("Pull Request Create - Behind/Diverged Status Test")
@@ -37,10 +38,8 @@ def main():
         env.run_mstl_cmd(["init", "-f", "mistletoe.json", "--ignore-stdin"])
 
         # Configure git user
-        import subprocess
         r_a = os.path.join(env.test_dir, repo_a)
-        subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "config", "user.name", "Test User"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        write_git_user(r_a)
 
         # --------------------------------------------------------------------------------
         # Prepare "Behind" Scenario
@@ -50,11 +49,11 @@ def main():
         branch_name = "feature/behind-test"
 
         # 1. Create feature branch and push it
-        subprocess.run(["git", "checkout", "-b", branch_name], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "checkout", "-b", branch_name], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
         with open(os.path.join(r_a, "initial.txt"), "w") as f: f.write("initial")
-        subprocess.run(["git", "add", "."], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "Initial feature commit"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "push", "-u", "origin", branch_name], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "add", "."], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "commit", "-m", "Initial feature commit"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "push", "-u", "origin", branch_name], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
 
         # 2. Simulate Remote Activity (Someone else pushed to the same branch)
         # We do this by cloning to another directory, committing, and pushing.
@@ -64,29 +63,28 @@ def main():
         # If using MOCK_GH_USER, repo is at root cwd.
         # If real, it's a github url.
         # We can read 'git remote get-url origin' from the initialized repo to be safe.
-        res = subprocess.run(["git", "remote", "get-url", "origin"], cwd=r_a, capture_output=True, text=True, check=True)
+        res = subprocess.run([GIT, "remote", "get-url", "origin"], cwd=r_a, capture_output=True, text=True, check=True)
         remote_url = res.stdout.strip()
 
-        subprocess.run(["git", "clone", remote_url, temp_clone_dir], check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "clone", remote_url, temp_clone_dir], check=True, stdout=subprocess.DEVNULL)
 
         # Checkout the branch in temp clone
-        subprocess.run(["git", "checkout", branch_name], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "config", "user.email", "other@example.com"], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "config", "user.name", "Other User"], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "checkout", branch_name], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
+        write_git_user(temp_clone_dir, "other@example.com", "Other User")
 
         # Add a commit and push
         with open(os.path.join(temp_clone_dir, "remote_change.txt"), "w") as f: f.write("remote change")
-        subprocess.run(["git", "add", "."], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "Remote change"], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "push"], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "add", "."], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "commit", "-m", "Remote change"], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "push"], cwd=temp_clone_dir, check=True, stdout=subprocess.DEVNULL)
 
         # 3. Create Local Divergence (Optional, but "Behind" is sufficient to trigger error)
         # Let's make it strictly "Behind" first (fast-forward possible but we are behind).
         # Actually, let's make it Diverged (Ahead and Behind) just to be sure.
         # Add local commit
         with open(os.path.join(r_a, "local_change.txt"), "w") as f: f.write("local change")
-        subprocess.run(["git", "add", "."], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
-        subprocess.run(["git", "commit", "-m", "Local change"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "add", "."], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "commit", "-m", "Local change"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
 
         # Now Local is Ahead 1, Behind 1.
         # Important: We must FETCH in the local repo so it knows it is behind.
@@ -99,7 +97,7 @@ def main():
         #   If noFetch is true, CollectStatus won't see the new remote commit unless we fetch manually here.
 
         print_green("[-] Fetching origin in local repo to ensure it sees the remote changes...")
-        subprocess.run(["git", "fetch", "origin"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
+        subprocess.run([GIT, "fetch", "origin"], cwd=r_a, check=True, stdout=subprocess.DEVNULL)
 
         # --------------------------------------------------------------------------------
         # Run Test
@@ -1,14 +1,14 @@
 #!/usr/bin/env python3
 import os
 import sys
-# Ensure manual_tests directory is in python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from gh_test_env import GhTestEnv
 from interactive_runner import InteractiveRunner, print_green
+from local_repo_env import GIT, write_git_user
 import subprocess
 import json
 
+
 def main():
     runner = InteractiveRunner("PR Create Missing Base Branch Test")
     runner.parse_args()
@@ -59,11 +59,11 @@ def main():
         print_green(f"[-] Initializing in {env.test_dir}...")
         env.run_mstl_cmd(["init", "-f", "mistletoe.json", "--ignore-stdin", "--verbose"])
 
+        r_dirs = [os.path.join(env.test_dir, r) for r in env.repo_names]
+
         # Configure dummy git user
-        for repo in env.repo_names:
-             r_dir = os.path.join(env.test_dir, repo)
-             subprocess.run(["git", "config", "user.email", "test@example.com"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-             subprocess.run(["git", "config", "user.name", "Test User"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+        for r_dir in r_dirs:
+             write_git_user(r_dir)
 
         # Switch branch
         print_green("[-] Switching to feature/missing-base-test...")
@@ -71,12 +71,11 @@ def main():
 
         # Make changes
         print_green("[-] Making commits...")
-        for repo in env.repo_names:
-            r_dir = os.path.join(env.test_dir, repo)
+        for r_dir in r_dirs:
             with open(os.path.join(r_dir, "test.txt"), "w") as f:
                 f.write("test content")
-            subprocess.run(["git", "add", "."], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
-            subprocess.run(["git", "commit", "-m", "Add test.txt"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+            subprocess.run([GIT, "add", "."], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
+            subprocess.run([GIT, "commit", "-m", "Add test.txt"], cwd=r_dir, check=True, stdout=subprocess.DEVNULL)
 
         print_green("[-] Running 'pr create'...")
 
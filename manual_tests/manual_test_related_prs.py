@@ -2,18 +2,20 @@ import argparse
 import os
 import time
 import sys
-import shutil
+import traceback
+import json
 import re
 import subprocess
 from gh_test_env import GhTestEnv
+from local_repo_env import GH, run_git, write_git_user
+
 
 def run_command(cmd, cwd=None, capture_output=False):
     """
     Execute a subprocess command.
     """
     try:
-        # If cmd is a list of strings, use it directly.
-        # If it's a string, use shell=True (but we prefer list).
+        # cmd is always an argument list; no shell is involved.
         if capture_output:
             result = subprocess.run(cmd, cwd=cwd, check=True, capture_output=True, text=True)
             return result.stdout
@@ -28,6 +30,21 @@ def run_command(cmd, cwd=None, capture_output=False):
              print(f"Stderr: {e.stderr}")
         raise e
 
+def wait_for_open_pr_url(repo_name, head, exclude=(), timeout=30):
+    """
+    Polls 'gh pr list' until an open PR from head, other than those in exclude,
+    shows up in repo_name and returns its URL, or None after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        out = run_command([GH, "pr", "list", "--repo", repo_name, "--head", head, "--state", "open", "--json", "url"], capture_output=True).strip()
+        urls = [pr["url"] for pr in json.loads(out or "[]") if pr["url"] not in exclude]
+        if urls:
+            return urls[0]
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(1)
+
 # ... (rest of the script)
 
 def test_related_prs(args):
@@ -58,14 +75,13 @@ def test_related_prs(args):
 
         # Commit A
         repo_dir = os.path.join(env.test_dir, repo_name)
-        run_command(["git", "config", "user.email", "you@example.com"], cwd=repo_dir)
-        run_command(["git", "config", "user.name", "Your Name"], cwd=repo_dir)
+        write_git_user(repo_dir, "you@example.com", "Your Name")
 
         file_a = os.path.join(repo_dir, "file_a.txt")
         with open(file_a, "w") as f:
             f.write("Change A\n")
-        run_command(["git", "add", "file_a.txt"], cwd=repo_dir)
-        run_command(["git", "commit", "-m", "Add file A"], cwd=repo_dir)
+        run_git(["-C", repo_dir, "add", "file_a.txt"], check=True)
+        run_git(["-C", repo_dir, "commit", "-m", "Add file A"], check=True)
 
         # PR Create A (Use --yes to skip confirmation)
         cmd_create_a = [env.mstl_bin, "pr", "create", "-t", "PR A", "-b", "First PR", "--yes"]
@@ -73,20 +89,15 @@ def test_related_prs(args):
 
         # Verify PR A exists
         print("Verifying PR A...")
-        time.sleep(2) # Wait for GH API
-
-        # Get PR A URL
-        pr_list_json = run_command(["gh", "pr", "list", "--repo", repo_name, "--head", "feature/related-pr-test", "--state", "open", "--json", "url"], capture_output=True).strip()
-        import json
-        prs = json.loads(pr_list_json)
-        if not prs:
+        # Get PR A URL once the GH API reports it
+        pr_a_url = wait_for_open_pr_url(repo_name, "feature/related-pr-test")
+        if not pr_a_url:
              raise Exception("PR A creation failed")
-        pr_a_url = prs[0]["url"]
         print(f"PR A Created: {pr_a_url}")
 
         # Merge PR A
         print(f"Merging PR A: {pr_a_url}")
-        run_command(["gh", "pr", "merge", pr_a_url, "--squash", "--delete-branch=false"], cwd=repo_dir)
+        run_command([GH, "pr", "merge", pr_a_url, "--squash", "--delete-branch=false"], cwd=repo_dir)
 
         # 4. Create PR B
         print("\n--- Step 4: Create PR B ---")
@@ -95,8 +106,8 @@ def test_related_prs(args):
         file_b = os.path.join(repo_dir, "file_b.txt")
         with open(file_b, "w") as f:
             f.write("Change B\n")
-        run_command(["git", "add", "file_b.txt"], cwd=repo_dir)
-        run_command(["git", "commit", "-m", "Add file B"], cwd=repo_dir)
+        run_git(["-C", repo_dir, "add", "file_b.txt"], check=True)
+        run_git(["-C", repo_dir, "commit", "-m", "Add file B"], check=True)
 
         # PR Create B
         cmd_create_b = [env.mstl_bin, "pr", "create", "-t", "PR B", "-b", "Second PR", "--yes"]
@@ -104,24 +115,17 @@ def test_related_prs(args):
 
         # Verify PR B exists
         print("Verifying PR B...")
-        time.sleep(2)
-
-        # Get PR B URL
-        pr_list_json_b = run_command(["gh", "pr", "list", "--repo", repo_name, "--head", "feature/related-pr-test", "--state", "open", "--json", "url"], capture_output=True).strip()
-        prs_b = json.loads(pr_list_json_b)
-        if not prs_b:
-             raise Exception("PR B creation failed")
-        pr_b_url = prs_b[0]["url"]
+        # Get PR B URL; the merged PR A may still be listed as open for a moment
+        pr_b_url = wait_for_open_pr_url(repo_name, "feature/related-pr-test", exclude=(pr_a_url,))
+        if not pr_b_url:
+             raise Exception("PR B creation failed (Merge failed or PR B not created correctly)")
         print(f"PR B Created: {pr_b_url}")
 
-        if pr_a_url == pr_b_url:
-             raise Exception("PR A and PR B are the same URL (Merge failed or PR B not created correctly)")
-
         # 5. Verify PR B Body
         print("\n--- Step 5: Verify PR B Body ---")
 
         # Get Body
-        body = run_command(["gh", "pr", "view", pr_b_url, "--json", "body", "-q", ".body"], capture_output=True)
+        body = run_command([GH, "pr", "view", pr_b_url, "--json", "body", "-q", ".body"], capture_output=True)
 
         print("Checking for PR A URL in body...")
         if pr_a_url not in body:
@@ -211,32 +215,26 @@ def test_related_prs_multi_repo(args):
         pr_a_urls = {}
         for name in repo_names:
             repo_dir = os.path.join(env.test_dir, name)
-            run_command(["git", "config", "user.email", "you@example.com"], cwd=repo_dir)
-            run_command(["git", "config", "user.name", "Your Name"], cwd=repo_dir)
+            write_git_user(repo_dir, "you@example.com", "Your Name")
 
             file_a = os.path.join(repo_dir, "file_a.txt")
             with open(file_a, "w") as f:
                 f.write("Change A\n")
-            run_command(["git", "add", "file_a.txt"], cwd=repo_dir)
-            run_command(["git", "commit", "-m", "Add file A"], cwd=repo_dir)
+            run_git(["-C", repo_dir, "add", "file_a.txt"], check=True)
+            run_git(["-C", repo_dir, "commit", "-m", "Add file A"], check=True)
 
         # PR Create A
         run_command([env.mstl_bin, "pr", "create", "-t", "PR A Multi", "-b", "First PR", "--yes"], cwd=env.test_dir)
-        time.sleep(5) # Wait a bit more for eventual consistency
 
         # Get PR A URLs and Merge
-        import json
         for name in repo_names:
-            json_str = run_command(["gh", "pr", "list", "--repo", name, "--head", "feature/related-pr-test-multi", "--state", "open", "--json", "url"], capture_output=True).strip()
-            # Handle empty list if creation failed/lagged
-            try:
-                pr_a_urls[name] = json.loads(json_str)[0]["url"]
-            except (IndexError, json.JSONDecodeError):
-                raise Exception(f"PR A creation failed for {name}. Output: {json_str}")
+            pr_a_urls[name] = wait_for_open_pr_url(name, "feature/related-pr-test-multi")
+            if not pr_a_urls[name]:
+                raise Exception(f"PR A creation failed for {name}")
 
             # Merge PR A
             print(f"Merging PR A for {name}: {pr_a_urls[name]}")
-            run_command(["gh", "pr", "merge", pr_a_urls[name], "--squash", "--delete-branch=false"], cwd=os.path.join(env.test_dir, name))
+            run_command([GH, "pr", "merge", pr_a_urls[name], "--squash", "--delete-branch=false"], cwd=os.path.join(env.test_dir, name))
 
         # 4. Create PR B
         print("\n--- Step 4: Create PR B ---")
@@ -245,21 +243,18 @@ def test_related_prs_multi_repo(args):
             file_b = os.path.join(repo_dir, "file_b.txt")
             with open(file_b, "w") as f:
                 f.write("Change B\n")
-            run_command(["git", "add", "file_b.txt"], cwd=repo_dir)
-            run_command(["git", "commit", "-m", "Add file B"], cwd=repo_dir)
+            run_git(["-C", repo_dir, "add", "file_b.txt"], check=True)
+            run_git(["-C", repo_dir, "commit", "-m", "Add file B"], check=True)
 
         # PR Create B
         run_command([env.mstl_bin, "pr", "create", "-t", "PR B Multi", "-b", "Second PR", "--yes"], cwd=env.test_dir)
-        time.sleep(5)
 
         # Get PR B URLs
         pr_b_urls = {}
         for name in repo_names:
-            json_str = run_command(["gh", "pr", "list", "--repo", name, "--head", "feature/related-pr-test-multi", "--state", "open", "--json", "url"], capture_output=True).strip()
-            try:
-                 pr_b_urls[name] = json.loads(json_str)[0]["url"]
-            except (IndexError, json.JSONDecodeError):
-                raise Exception(f"PR B creation failed for {name}. Output: {json_str}")
+            pr_b_urls[name] = wait_for_open_pr_url(name, "feature/related-pr-test-multi", exclude=(pr_a_urls[name],))
+            if not pr_b_urls[name]:
+                raise Exception(f"PR B creation failed for {name}")
 
         # 5. Verify PR B Body in Repo 1 (Should contain PR A and B from Repo 2)
         print("\n--- Step 5: Verify PR B Body ---")
@@ -272,7 +267,7 @@ def test_related_prs_multi_repo(args):
         source_pr_b_url = pr_b_urls[source_repo]
 
         print(f"Checking PR {target_pr_url} body...")
-        body = run_command(["gh", "pr", "view", target_pr_url, "--json", "body", "-q", ".body"], capture_output=True)
+        body = run_command([GH, "pr", "view", target_pr_url, "--json", "body", "-q", ".body"], capture_output=True)
 
         print(f"Looking for Source PR A (Merged): {source_pr_a_url}")
         if source_pr_a_url not in body:
@@ -300,7 +295,6 @@ def test_related_prs_multi_repo(args):
 
     except Exception as e:
         print(f"\nERROR: {e}")
-        import traceback
         traceback.print_exc()
         if args.output:
             with open(args.output, "a") as f:
@@ -6,8 +6,9 @@ import subprocess
 import json
 import atexit
 
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
+from local_repo_env import GIT
+
 
 def log(msg):
     print_green(f"[TEST] {msg}")
@@ -44,7 +45,7 @@ class SwitchCheckTest:
         env["GIT_AUTHOR_EMAIL"] = "test@example.com"
         env["GIT_COMMITTER_NAME"] = "Test"
         env["GIT_COMMITTER_EMAIL"] = "test@example.com"
-        subprocess.run(["git"] + list(args), cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
+        subprocess.run([GIT] + list(args), cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env)
 
     def setup(self):
         log(f"Setting up in {self.test_dir}")
@@ -114,7 +115,7 @@ class SwitchCheckTest:
 
         # Verify branches
         def get_branch(d):
-            res = subprocess.run(["git", "symbolic-ref", "--short", "HEAD"], cwd=d, capture_output=True, text=True)
+            res = subprocess.run([GIT, "symbolic-ref", "--short", "HEAD"], cwd=d, capture_output=True, text=True)
             return res.stdout.strip()
 
         b1 = get_branch(self.repo1_dir)
@@ -6,9 +6,9 @@ import subprocess
 import json
 import atexit
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
+from local_repo_env import GIT
+
 
 def log(msg):
     print_green(f"[TEST] {msg}")
@@ -89,25 +89,25 @@ class SwitchUpstreamTest:
 
         # 1. Init Bare Remote
         remote_path = os.path.join(self.remote_dir, "repo1.git")
-        self.run_cmd(["git", "init", "--bare", remote_path])
+        self.run_cmd([GIT, "init", "--bare", remote_path])
 
         # 2. Seed Remote (via temp clone)
         seed_path = os.path.join(self.test_dir, "seed")
-        self.run_cmd(["git", "clone", remote_path, seed_path])
-        self.run_cmd(["git", "commit", "--allow-empty", "-m", "init"], cwd=seed_path)
-        self.run_cmd(["git", "branch", "-M", "master"], cwd=seed_path)
-        self.run_cmd(["git", "push", "origin", "master"], cwd=seed_path)
+        self.run_cmd([GIT, "clone", remote_path, seed_path])
+        self.run_cmd([GIT, "commit", "--allow-empty", "-m", "init"], cwd=seed_path)
+        self.run_cmd([GIT, "branch", "-M", "master"], cwd=seed_path)
+        self.run_cmd([GIT, "push", "origin", "master"], cwd=seed_path)
 
         # Fix bare repo HEAD to point to master (avoids warning on subsequent clones)
-        self.run_cmd(["git", "--git-dir", remote_path, "symbolic-ref", "HEAD", "refs/heads/master"])
+        self.run_cmd([GIT, "--git-dir", remote_path, "symbolic-ref", "HEAD", "refs/heads/master"])
 
         # 3. Create 'feature/upstream-test' on remote
-        self.run_cmd(["git", "checkout", "-b", "feature/upstream-test"], cwd=seed_path)
-        self.run_cmd(["git", "push", "origin", "feature/upstream-test"], cwd=seed_path)
+        self.run_cmd([GIT, "checkout", "-b", "feature/upstream-test"], cwd=seed_path)
+        self.run_cmd([GIT, "push", "origin", "feature/upstream-test"], cwd=seed_path)
 
         # 4. Clone to local 'repo1' using file:// URL to match config expectations
         repo1_url = "file://" + remote_path
-        self.run_cmd(["git", "clone", repo1_url, os.path.join(self.repos_dir, "repo1")])
+        self.run_cmd([GIT, "clone", repo1_url, os.path.join(self.repos_dir, "repo1")])
 
         # 5. Create Config
         config = {
@@ -123,7 +123,7 @@ class SwitchUpstreamTest:
 
         # Verify local does not have the branch yet
         repo1_dir = os.path.join(self.repos_dir, "repo1")
-        res = self.run_cmd(["git", "branch", "--list", "feature/upstream-test"], cwd=repo1_dir)
+        res = self.run_cmd([GIT, "branch", "--list", "feature/upstream-test"], cwd=repo1_dir)
         if "feature/upstream-test" in res.stdout:
             self.fail("Branch feature/upstream-test should not exist locally yet")
 
@@ -132,8 +132,8 @@ class SwitchUpstreamTest:
         self.run_cmd([self.bin_path, "switch", "-c", "feature/upstream-test", "-f", self.config_file, "--ignore-stdin", "--verbose"], cwd=self.repos_dir)
 
         # Verify Upstream
-        res_remote = self.run_cmd(["git", "config", "branch.feature/upstream-test.remote"], cwd=repo1_dir, check=False)
-        res_merge = self.run_cmd(["git", "config", "branch.feature/upstream-test.merge"], cwd=repo1_dir, check=False)
+        res_remote = self.run_cmd([GIT, "config", "branch.feature/upstream-test.remote"], cwd=repo1_dir, check=False)
+        res_merge = self.run_cmd([GIT, "config", "branch.feature/upstream-test.merge"], cwd=repo1_dir, check=False)
 
         if res_remote.stdout.strip() != "origin":
             self.fail(f"Upstream remote not set to origin. Got: {res_remote.stdout.strip()}")
@@ -149,7 +149,7 @@ class SwitchUpstreamTest:
         self.run_cmd([self.bin_path, "switch", "-c", "feature/no-remote", "-f", self.config_file, "--ignore-stdin", "--verbose"], cwd=self.repos_dir)
 
         repo1_dir = os.path.join(self.repos_dir, "repo1")
-        res_remote = self.run_cmd(["git", "config", "branch.feature/no-remote.remote"], cwd=repo1_dir, check=False)
+        res_remote = self.run_cmd([GIT, "config", "branch.feature/no-remote.remote"], cwd=repo1_dir, check=False)
 
         if res_remote.returncode == 0 and res_remote.stdout.strip() != "":
              self.fail(f"Upstream should NOT be set for feature/no-remote. Got: {res_remote.stdout.strip()}")
@@ -6,9 +6,9 @@ import subprocess
 import json
 import atexit
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
+from local_repo_env import GIT
+
 
 def log(msg):
     print_green(f"[TEST] {msg}")
@@ -85,25 +85,25 @@ class MstlManualTestSyncConflict:
     def setup_repo(self):
         log("Setting up remote repository...")
         os.makedirs(self.remote_dir, exist_ok=True)
-        self.run_cmd(["git", "init", "--bare", os.path.join(self.remote_dir, "repo1.git")])
+        self.run_cmd([GIT, "init", "--bare", os.path.join(self.remote_dir, "repo1.git")])
 
         log("Seeding remote...")
         os.makedirs(self.seed_dir, exist_ok=True)
 
         # Clone to seed dir
-        self.run_cmd(["git", "clone", os.path.join(self.remote_dir, "repo1.git"), os.path.join(self.seed_dir, "repo1")])
+        self.run_cmd([GIT, "clone", os.path.join(self.remote_dir, "repo1.git"), os.path.join(self.seed_dir, "repo1")])
         repo1_seed = os.path.join(self.seed_dir, "repo1")
-        self.run_cmd(["git", "checkout", "-b", "main"], cwd=repo1_seed, check=False)
+        self.run_cmd([GIT, "checkout", "-b", "main"], cwd=repo1_seed, check=False)
 
         with open(os.path.join(repo1_seed, "README.md"), "w") as f:
             f.write("# Repo 1\nLine 1\nLine 2\n")
 
-        self.run_cmd(["git", "add", "README.md"], cwd=repo1_seed)
-        self.run_cmd(["git", "commit", "-m", "Initial commit"], cwd=repo1_seed)
-        self.run_cmd(["git", "push", "origin", "main"], cwd=repo1_seed)
+        self.run_cmd([GIT, "add", "README.md"], cwd=repo1_seed)
+        self.run_cmd([GIT, "commit", "-m", "Initial commit"], cwd=repo1_seed)
+        self.run_cmd([GIT, "push", "origin", "main"], cwd=repo1_seed)
 
         # Ensure HEAD matches
-        self.run_cmd(["git", "--git-dir", os.path.join(self.remote_dir, "repo1.git"), "symbolic-ref", "HEAD", "refs/heads/main"])
+        self.run_cmd([GIT, "--git-dir", os.path.join(self.remote_dir, "repo1.git"), "symbolic-ref", "HEAD", "refs/heads/main"])
 
     def create_config(self):
         config = {
@@ -134,16 +134,16 @@ class MstlManualTestSyncConflict:
         repo1_seed = os.path.join(self.seed_dir, "repo1")
         with open(os.path.join(repo1_seed, "README.md"), "w") as f:
             f.write("# Repo 1\nLine 1 (Remote)\nLine 2\n")
-        self.run_cmd(["git", "add", "README.md"], cwd=repo1_seed)
-        self.run_cmd(["git", "commit", "-m", "Remote Update"], cwd=repo1_seed)
-        self.run_cmd(["git", "push", "origin", "main"], cwd=repo1_seed)
+        self.run_cmd([GIT, "add", "README.md"], cwd=repo1_seed)
+        self.run_cmd([GIT, "commit", "-m", "Remote Update"], cwd=repo1_seed)
+        self.run_cmd([GIT, "push", "origin", "main"], cwd=repo1_seed)
 
         # Modify Local (same line)
         repo1_local = os.path.join(self.repos_dir, "repo1")
         with open(os.path.join(repo1_local, "README.md"), "w") as f:
             f.write("# Repo 1\nLine 1 (Local)\nLine 2\n")
-        self.run_cmd(["git", "add", "README.md"], cwd=repo1_local)
-        self.run_cmd(["git", "commit", "-m", "Local Update"], cwd=repo1_local)
+        self.run_cmd([GIT, "add", "README.md"], cwd=repo1_local)
+        self.run_cmd([GIT, "commit", "-m", "Local Update"], cwd=repo1_local)
 
         # 2. Check Status
         log("Checking status (should show conflict or divergence)...")
@@ -6,9 +6,9 @@ import subprocess
 import json
 import atexit
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import InteractiveRunner, print_green, print_red
+from local_repo_env import GIT
+
 
 def log(msg):
     print_green(f"[TEST] {msg}")
@@ -91,24 +91,24 @@ class UpstreamSafetyTest:
         os.makedirs(self.repos_dir, exist_ok=True)
 
         # Repo 1
-        self.run_cmd(["git", "init", "--bare", os.path.join(self.remotes_dir, "repo1.git")])
+        self.run_cmd([GIT, "init", "--bare", os.path.join(self.remotes_dir, "repo1.git")])
         repo1_remote_path = os.path.abspath(os.path.join(self.remotes_dir, "repo1.git"))
-        self.run_cmd(["git", "clone", repo1_remote_path, os.path.join(self.repos_dir, "repo1")])
+        self.run_cmd([GIT, "clone", repo1_remote_path, os.path.join(self.repos_dir, "repo1")])
 
         repo1_local = os.path.join(self.repos_dir, "repo1")
-        self.run_cmd(["git", "commit", "--allow-empty", "-m", "init"], cwd=repo1_local)
-        self.run_cmd(["git", "branch", "-M", "master"], cwd=repo1_local)
-        self.run_cmd(["git", "push", "origin", "master"], cwd=repo1_local)
+        self.run_cmd([GIT, "commit", "--allow-empty", "-m", "init"], cwd=repo1_local)
+        self.run_cmd([GIT, "branch", "-M", "master"], cwd=repo1_local)
+        self.run_cmd([GIT, "push", "origin", "master"], cwd=repo1_local)
 
         # Repo 2
-        self.run_cmd(["git", "init", "--bare", os.path.join(self.remotes_dir, "repo2.git")])
+        self.run_cmd([GIT, "init", "--bare", os.path.join(self.remotes_dir, "repo2.git")])
         repo2_remote_path = os.path.abspath(os.path.join(self.remotes_dir, "repo2.git"))
-        self.run_cmd(["git", "clone", repo2_remote_path, os.path.join(self.repos_dir, "repo2")])
+        self.run_cmd([GIT, "clone", repo2_remote_path, os.path.join(self.repos_dir, "repo2")])
 
         repo2_local = os.path.join(self.repos_dir, "repo2")
-        self.run_cmd(["git", "commit", "--allow-empty", "-m", "init"], cwd=repo2_local)
-        self.run_cmd(["git", "branch", "-M", "master"], cwd=repo2_local)
-        self.run_cmd(["git", "push", "origin", "master"], cwd=repo2_local)
+        self.run_cmd([GIT, "commit", "--allow-empty", "-m", "init"], cwd=repo2_local)
+        self.run_cmd([GIT, "branch", "-M", "master"], cwd=repo2_local)
+        self.run_cmd([GIT, "push", "origin", "master"], cwd=repo2_local)
 
         # Config
         config = {
@@ -123,15 +123,15 @@ class UpstreamSafetyTest:
     def test_mismatch(self):
         log("Scenario 1: Testing mismatch upstream name...")
         repo1_local = os.path.join(self.repos_dir, "repo1")
-        self.run_cmd(["git", "checkout", "-b", "feature-mismatch"], cwd=repo1_local)
-        self.run_cmd(["git", "branch", "-u", "origin/master"], cwd=repo1_local)
+        self.run_cmd([GIT, "checkout", "-b", "feature-mismatch"], cwd=repo1_local)
+        self.run_cmd([GIT, "branch", "-u", "origin/master"], cwd=repo1_local)
 
         # Run Status
         log("Running mstl status...")
         self.run_cmd([self.bin_path, "status", "-f", self.config_file], cwd=self.repos_dir)
 
         # Verify
-        res = subprocess.run(["git", "rev-parse", "--abbrev-ref", "@{u}"], cwd=repo1_local, capture_output=True, text=True)
+        res = subprocess.run([GIT, "rev-parse", "--abbrev-ref", "@{u}"], cwd=repo1_local, capture_output=True, text=True)
         if res.returncode == 0:
             fail(f"Upstream was NOT unset for mismatched branch. Upstream: {res.stdout.strip()}")
         log("Success: Upstream unset for mismatch.")
@@ -139,21 +139,21 @@ class UpstreamSafetyTest:
     def test_missing_remote(self):
         log("Scenario 2: Testing missing remote branch...")
         repo2_local = os.path.join(self.repos_dir, "repo2")
-        self.run_cmd(["git", "checkout", "-b", "feature-gone"], cwd=repo2_local)
-        self.run_cmd(["git", "push", "-u", "origin", "feature-gone"], cwd=repo2_local)
+        self.run_cmd([GIT, "checkout", "-b", "feature-gone"], cwd=repo2_local)
+        self.run_cmd([GIT, "push", "-u", "origin", "feature-gone"], cwd=repo2_local)
 
         # Delete remote branch via another client (or direct push delete)
         # To avoid repo2 local update during push delete, clone a temp one
         tmp_repo = os.path.join(self.test_dir, "repo2_tmp")
-        self.run_cmd(["git", "clone", os.path.join(self.remotes_dir, "repo2.git"), tmp_repo])
-        self.run_cmd(["git", "push", "origin", "--delete", "feature-gone"], cwd=tmp_repo)
+        self.run_cmd([GIT, "clone", os.path.join(self.remotes_dir, "repo2.git"), tmp_repo])
+        self.run_cmd([GIT, "push", "origin", "--delete", "feature-gone"], cwd=tmp_repo)
 
         # Run Status
         log("Running mstl status...")
         self.run_cmd([self.bin_path, "status", "-f", self.config_file], cwd=self.repos_dir)
 
         # Verify
-        res = subprocess.run(["git", "rev-parse", "--abbrev-ref", "@{u}"], cwd=repo2_local, capture_output=True, text=True)
+        res = subprocess.run([GIT, "rev-parse", "--abbrev-ref", "@{u}"], cwd=repo2_local, capture_output=True, text=True)
         if res.returncode == 0:
              fail(f"Upstream was NOT unset for missing remote branch. Upstream: {res.stdout.strip()}")
         log("Success: Upstream unset for missing remote.")
@@ -4,9 +4,8 @@ import subprocess
 import sys
 import json
 
-# Adjust path to import test_env
-sys.path.append(os.path.dirname(__file__))
 from gh_test_env import GhTestEnv
+from local_repo_env import write_git_user
 
 def setup_repo(env, repo_name):
     os.makedirs(env.test_dir, exist_ok=True)
@@ -15,8 +14,7 @@ def setup_repo(env, repo_name):
         shutil.rmtree(repo_path)
     os.makedirs(repo_path)
     subprocess.check_call(["git", "init"], cwd=repo_path)
-    subprocess.check_call(["git", "config", "user.email", "test@example.com"], cwd=repo_path)
-    subprocess.check_call(["git", "config", "user.name", "Test User"], cwd=repo_path)
+    write_git_user(repo_path)
 
     # Commit C1
     with open(os.path.join(repo_path, "file1.txt"), "w") as f:
@@ -2,11 +2,8 @@
 import subprocess
 import json
 import sys
-import os
 import argparse
 
-# Add current directory to sys.path to import interactive_runner
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from interactive_runner import print_green, print_red
 
 def run_command(args):